@@ -67,8 +67,8 @@ def test_mrc_precoder_distance_sweep(
         satellite_manager.update_positions(config=config)
 
         satellite_manager.calculate_satellite_distances_to_users(users=user_manager.users)
-        satellite_manager.calculate_satellite_aods_to_users(users=user_manager.users)
-        satellite_manager.calculate_steering_vectors_to_users(users=user_manager.users)
+        satellite_manager.calculate_satellite_aods_to_users()
+        satellite_manager.calculate_steering_vectors_to_users()
         satellite_manager.update_channel_state_information(channel_model=los_channel_model, users=user_manager.users)
         satellite_manager.update_erroneous_channel_state_information(error_model_config=config.error_model, users=user_manager.users)
 
@@ -1,12 +1,7 @@
 
 from numpy import (
     arange,
-    zeros,
-    mean,
-    std,
-)
-from datetime import (
-    datetime,
+    repeat,
 )
 from pathlib import (
     Path,
@@ -24,14 +19,8 @@ from matplotlib.pyplot import (
 from src.config.config import (
     Config,
 )
-from src.data.satellite_manager import (
-    SatelliteManager,
-)
-from src.data.user_manager import (
-    UserManager,
-)
-from src.data.channel.los_channel_model import (
-    los_channel_model,
+from src.data.generate_channels import (
+    generate_channels,
 )
 from src.data.precoder.mrc_precoder import (
     mrc_precoder_normalized,
@@ -54,33 +43,6 @@ def test_mrc_precoder_error_sweep(
         monte_carlo_iterations,
 ) -> None:
 
-    def progress_print() -> None:
-        progress = (error_sweep_idx * monte_carlo_iterations + iter_idx + 1) / (len(csit_error_sweep_range) * monte_carlo_iterations)
-        timedelta = datetime.now() - real_time_start
-        finish_time = real_time_start + timedelta / progress
-
-        print(f'\rSimulation completed: {progress:.2%}, '
-              f'est. finish {finish_time.hour:02d}:{finish_time.minute:02d}:{finish_time.second:02d}', end='')
-
-    def set_new_error_value() -> None:
-        if config.error_model.error_model_name == 'err_mult_on_steering_cos':
-            config.error_model.uniform_error_interval['low'] = -1 * error_sweep_value
-            config.error_model.uniform_error_interval['high'] = error_sweep_value
-        elif config.error_model.error_model_name == 'err_sat2userdist':
-            config.error_model.distance_error_std = error_sweep_value
-        else:
-            raise ValueError('Unknown error model name')
-
-    def sim_update():
-        user_manager.update_positions(config=config)
-        satellite_manager.update_positions(config=config)
-
-        satellite_manager.calculate_satellite_distances_to_users(users=user_manager.users)
-        satellite_manager.calculate_satellite_aods_to_users(users=user_manager.users)
-        satellite_manager.calculate_steering_vectors_to_users(users=user_manager.users)
-        satellite_manager.update_channel_state_information(channel_model=los_channel_model, users=user_manager.users)
-        satellite_manager.update_erroneous_channel_state_information(error_model_config=config.error_model, users=user_manager.users)
-
     def save_results():
         name = f'testing_mrc_sweep_{csit_error_sweep_range[0]}_{csit_error_sweep_range[-1]}_userwiggle_{config.user_dist_bound}.gzip'
         results_path = Path(config.output_metrics_path,
@@ -91,55 +53,39 @@ def test_mrc_precoder_error_sweep(
         with gzip_open(Path(results_path, name), 'wb') as file:
             pickle_dump([csit_error_sweep_range, metrics], file=file)
 
-    satellite_manager = SatelliteManager(config=config)
-    user_manager = UserManager(config=config)
-
-    real_time_start = datetime.now()
-
     profiler = None
     if config.profile:
         profiler = start_profiling()
 
+    # all sweep points x monte carlo realizations in one batch, with the swept error parameter
+    #  set per realization, drawn from streams of their own
+    config.error_model.set_sweep_value(repeat(csit_error_sweep_range, monte_carlo_iterations))
+    channel_states, erroneous_channel_states = generate_channels(
+        config=config,
+        n=len(csit_error_sweep_range) * monte_carlo_iterations,
+        rng_streams=config.rng_streams.child('error_sweep'),
+    )
+
+    # precode and evaluate all realizations at once
+    w_mrc = mrc_precoder_normalized(
+        channel_matrix=erroneous_channel_states,
+        **config.mrc_args,
+    )
+    sum_rate_per_monte_carlo = calc_sum_rate_no_iui(
+        channel_state=channel_states,
+        w_precoder=w_mrc,
+        noise_power_watt=config.noise_power_watt
+    ).reshape((len(csit_error_sweep_range), monte_carlo_iterations))
+
     metrics = {
         'sum_rate': {
             'mrc': {
-                'mean': zeros(len(csit_error_sweep_range)),
-                'std': zeros(len(csit_error_sweep_range)),
+                'mean': sum_rate_per_monte_carlo.mean(axis=1),
+                'std': sum_rate_per_monte_carlo.std(axis=1),
             },
         },
     }
 
-    for error_sweep_idx, error_sweep_value in enumerate(csit_error_sweep_range):
-
-        # set new error value
-        set_new_error_value()
-
-        # set up per monte carlo metrics
-        sum_rate_per_monte_carlo = zeros(monte_carlo_iterations)
-
-        for iter_idx in range(monte_carlo_iterations):
-
-            sim_update()
-
-            w_mrc = mrc_precoder_normalized(
-                channel_matrix=satellite_manager.erroneous_channel_state_information,
-                **config.mrc_args,
-            )
-            sum_rate = calc_sum_rate_no_iui(
-                channel_state=satellite_manager.channel_state_information,
-                w_precoder=w_mrc,
-                noise_power_watt=config.noise_power_watt
-            )
-
-            # log results
-            sum_rate_per_monte_carlo[iter_idx] = sum_rate
-
-            if iter_idx % 50 == 0:
-                progress_print()
-
-        metrics['sum_rate']['mrc']['mean'][error_sweep_idx] = mean(sum_rate_per_monte_carlo)
-        metrics['sum_rate']['mrc']['std'][error_sweep_idx] = std(sum_rate_per_monte_carlo)
-
     if profiler is not None:
         end_profiling(profiler)
 
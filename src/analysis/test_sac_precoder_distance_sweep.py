@@ -78,8 +78,8 @@ def test_sac_precoder_distance_sweep(
         satellite_manager.update_positions(config=config)
 
         satellite_manager.calculate_satellite_distances_to_users(users=user_manager.users)
-        satellite_manager.calculate_satellite_aods_to_users(users=user_manager.users)
-        satellite_manager.calculate_steering_vectors_to_users(users=user_manager.users)
+        satellite_manager.calculate_satellite_aods_to_users()
+        satellite_manager.calculate_steering_vectors_to_users()
         satellite_manager.update_channel_state_information(channel_model=los_channel_model, users=user_manager.users)
         satellite_manager.update_erroneous_channel_state_information(error_model_config=config.error_model, users=user_manager.users)
 
@@ -97,15 +97,14 @@ def test_sac_precoder_distance_sweep(
 
         # reshape to fit reward calculation
         w_precoder = real_vector_to_half_complex_vector(w_precoder)
-        w_precoder = w_precoder.reshape((config.sat_nr * config.sat_ant_nr, config.user_nr))
+        w_precoder = w_precoder.reshape((config.sat_tot_ant_nr, config.user_nr))
 
         # normalize
         return norm_precoder(
             precoding_matrix=w_precoder,
             power_constraint_watt=config.power_constraint_watt,
             per_satellite=True,
-            sat_nr=config.sat_nr,
-            sat_ant_nr=config.sat_ant_nr)
+            antenna_sat_idx=config.sat_antenna_sat_idx)
 
     satellite_manager = SatelliteManager(config=config)
     user_manager = UserManager(config=config)
@@ -6,8 +6,13 @@ from pathlib import (
 from sys import (
     stdout,
 )
-from numpy.random import (
-    default_rng,
+from numpy import (
+    ndarray,
+    arange,
+    sqrt,
+    cos,
+    arccos,
+    pi,
 )
 from scipy import (
     constants,
@@ -31,6 +36,15 @@ from src.data.channel.los_channel_model import (
 from src.utils.get_wavelength import (
     get_wavelength,
 )
+from src.utils.rng_streams import (
+    RngStreams,
+)
+from src.utils.get_antenna_layout import (
+    get_antenna_layout,
+)
+from src.utils.kernel_backend import (
+    set_kernel_backend,
+)
 
 
 class Config:
@@ -47,15 +61,22 @@ class Config:
         # General
         self.profile: bool = False  # performance profiling
         self.show_plots: bool = True
+        self.seed: int = None  # root seed of all random number streams, None = fresh entropy
+        self.rng_pool_block_size: int = None  # pre-draw simulation random numbers in blocks of this size, None = no pooling
 
         self.verbosity: int = 1  # 0 = no prints, 1 = prints
         self._logging_level_stdio = logging.INFO  # DEBUG < INFO < WARNING < ERROR < CRITICAL
         self._logging_level_file = logging.WARNING
         self._logging_level_tensorflow = logging.WARNING
 
+        self.precision: str = 'double'  # 'double', 'single': float32/complex64 channel tensors, precoders and sum rates
+        self.kernel_backend: str = 'numpy'  # 'numpy', 'numba': compiled kernels for unbatched hot paths, needs numba
+
         # Basic Communication Parameters
         self.freq: float = 2 * 10**9
-        self.noise_power_watt: float = 10**(7 / 10) * 290 * constants.value('Boltzmann constant') * 30 * 10**6  # Noise power
+        self.bandwidth_hz: float = 30 * 10**6
+        self.noise_power_watt: float = 10**(7 / 10) * 290 * constants.value('Boltzmann constant') * self.bandwidth_hz  # Noise power
+        self.subcarrier_nr: int = 1  # Subcarriers evenly spaced over the bandwidth, for the multicarrier channel state
         self.power_constraint_watt = 100  # in watt
 
         self.wavelength: float = get_wavelength(self.freq)
@@ -65,6 +86,11 @@ class Config:
         self.radius_earth: float = 6378.1 * 10**3  # Earth radius RE, earth centered
 
         self.radius_orbit: float = self.altitude_orbit + self.radius_earth  # Orbit radius with Earth center r0, earth centered
+        self.earth_gravitational_parameter: float = 3.986004418 * 10**14  # GM of Earth in m^3/s^2
+
+        self.sat_position_mode: str = 'random'  # 'random': new positions every step, 'propagate': satellites move along their orbits
+        self.orbit_time_step_s: float = 0.1  # Time between steps in propagation mode, ~0.006 deg of orbit
+        self.orbit_trajectory_steps: int = 1_000  # Steps per precomputed trajectory, e.g., one episode
 
         # User
         self.user_nr: int = 3  # Number of users
@@ -82,22 +108,26 @@ class Config:
         self.sat_dist_average: float = 10_000  # Average satellite distance in meter
         self.sat_dist_bound: float = 0  # Variance of sat distance, uniform distribution [avg-bound, avg+bound]
         self.sat_center_aod_earth_deg: float = 90  # Average center of satellites
+        self.sat_min_elevation_deg: float = None  # Users only see satellites above this elevation, None = all visible
 
         self.sat_gain_linear: float = 10**(self.sat_gain_dBi / 10)  # Gain per satellite linear
         self.sat_ant_nr: int = int(self.sat_tot_ant_nr / self.sat_nr)  # Number of Tx antennas per satellite
+        self.sat_ant_nrs: list = [self.sat_ant_nr] * self.sat_nr  # Tx antennas of each satellite, may differ, e.g., [2, 4], sum == sat_tot_ant_nr
         self.sat_ant_gain_linear: float = self.sat_gain_linear / self.sat_tot_ant_nr  # Gain per satellite antenna
         self.sat_ant_dist: float = 3 * self.wavelength / 2  # Distance between antenna elements in meter
 
         # Channel Model
         self.channel_model = los_channel_model
+        self.steering_vector_cache_quantization: float = None  # steering vector lookup table resolution in cos(aod), None = no table
+        self.steering_vector_cache_interpolation: bool = False  # interpolate between table entries instead of nearest entry
 
         # Learner
         # self.config_learner = ConfigTD3Learner(size_state=self.sat_nr*self.user_nr,
         #                                        num_actions=2*self.sat_nr*self.sat_ant_nr*self.user_nr)
         self.config_learner = ConfigSACLearner(
             # size_state=self.sat_nr*self.user_nr,
-            size_state=2*self.sat_nr*self.sat_ant_nr*self.user_nr,
-            num_actions=2*self.sat_nr*self.sat_ant_nr*self.user_nr,
+            size_state=2*self.sat_tot_ant_nr*self.user_nr,
+            num_actions=2*self.sat_tot_ant_nr*self.user_nr,
         )
 
         self._post_init()
@@ -105,7 +135,6 @@ class Config:
     def _pre_init(
             self,
     ) -> None:
-        self.rng = default_rng()
         self.logger = logging.getLogger()
 
         self.project_root_path = Path(__file__).parent.parent.parent
@@ -121,17 +150,52 @@ class Config:
             self,
     ) -> None:
 
+        # Random Number Streams
+        #  environment: user and satellite positions, error_model: csi errors,
+        #  learner: network init and replay sampling, training: training loop decisions
+        self.rng_streams = RngStreams(seed=self.seed, pool_block_size=self.rng_pool_block_size)
+        self.rng = self.rng_streams.get_pooled('environment')
+
         # Error Model
         self.error_model = ConfigErrorModel()
 
         # Logging
         self.logfile_path = Path(self.project_root_path, 'outputs', 'logs', 'log.txt')
         self.__logging_setup()
+        self.logger.info(f'root seed {self.rng_streams.seed}')
+
+        # Kernel Backend
+        self.kernel_backend = set_kernel_backend(self.kernel_backend, logger=self.logger)
+
+        # Flat antenna layout, antenna major: ant 1 sat 1, ant 1 sat 2, ..., ant 2 sat 1, ...
+        if sum(self.sat_ant_nrs) != self.sat_tot_ant_nr:
+            raise ValueError(f'Antennas per satellite {self.sat_ant_nrs} do not sum to {self.sat_tot_ant_nr}')
+        self.sat_antenna_sat_idx: ndarray = get_antenna_layout(self.sat_ant_nrs)[0]  # satellite of every antenna column
+
+        # Propagation mode, satellites starting above the users must stay above the minimum elevation, or
+        #  the horizon, for one trajectory, i.e., within the Earth central angle of that elevation
+        if self.sat_position_mode == 'propagate':
+            min_elevation_rad = (self.sat_min_elevation_deg or 0) * pi / 180
+            visible_arc_rad = arccos(self.radius_earth / self.radius_orbit * cos(min_elevation_rad)) - min_elevation_rad
+            orbit_arc_rad = (
+                self.orbit_time_step_s * self.orbit_trajectory_steps
+                * sqrt(self.earth_gravitational_parameter / self.radius_orbit ** 3)
+            )
+            if orbit_arc_rad > visible_arc_rad:
+                raise ValueError(
+                    f'Satellites move {orbit_arc_rad * 180 / pi:.1f} deg per trajectory, but are only visible '
+                    f'for {visible_arc_rad * 180 / pi:.1f} deg, reduce orbit_time_step_s or orbit_trajectory_steps')
+
+        # Multicarrier, subcarrier center frequencies around freq
+        self.subcarrier_freqs: ndarray = (
+            self.freq + (arange(self.subcarrier_nr) - (self.subcarrier_nr - 1) / 2) * self.bandwidth_hz / self.subcarrier_nr
+        )
+        self.subcarrier_wavelengths: ndarray = get_wavelength(self.subcarrier_freqs)
+        self.subcarrier_noise_power_watt: float = self.noise_power_watt / self.subcarrier_nr  # Noise in one subcarrier's bandwidth
 
         # Collected args
         self.satellite_args: dict = {
             'rng': self.rng,
-            'antenna_nr': self.sat_ant_nr,
             'antenna_distance': self.sat_ant_dist,
             'antenna_gain_linear': self.sat_ant_gain_linear,
             'freq': self.freq,
@@ -147,6 +211,12 @@ class Config:
             'noise_power_watt': self.noise_power_watt,
             'sat_nr': self.sat_nr,
             'sat_ant_nr': self.sat_ant_nr,
+            'antenna_sat_idx': self.sat_antenna_sat_idx,
+        }
+
+        self.subcarrier_mmse_args: dict = {  # MMSE per subcarrier of the multicarrier channel state
+            **self.mmse_args,
+            'noise_power_watt': self.subcarrier_noise_power_watt,
         }
 
         self.mrc_args: dict = {
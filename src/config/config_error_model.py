@@ -11,11 +11,25 @@ from src.data.channel.los_channel_error_model_in_sat2user_dist import (
 from src.data.channel.los_channel_error_model_in_sat_and_user_pos import (
     los_channel_error_model_in_sat_and_user_pos
 )
+from src.data.channel.los_channel_error_model_pipeline import (
+    los_channel_error_model_pipeline,
+)
+from src.data.channel.los_channel_error_stages import (
+    error_stage_sat_phase,
+    error_stage_sat2user_dist,
+    error_stage_steering_cos,
+)
+from src.data.channel.error_model_registry import (
+    ERROR_MODEL_REGISTRY,
+    ERROR_STAGE_REGISTRY,
+)
 
 
 class ConfigErrorModel:
     """
-    Defines parameters for the error model
+    Defines parameters for the error model, as declared in the error model registry.
+    Parameters may be set per realization (batch_size,) to evaluate several error
+    magnitudes in one batch, e.g., a whole sweep axis with generate_channels.
     """
 
     def __init__(
@@ -26,46 +40,81 @@ class ConfigErrorModel:
         self.error_model = los_channel_error_model_multiplicative_on_cos
         # self.error_model = los_channel_error_model_in_sat2user_dist
         # self.error_model = los_channel_error_model_in_sat_and_user_pos
+        # self.error_model = los_channel_error_model_pipeline
+
+        # stages of the pipeline error model, applied in one fused pass
+        self.error_stages: list = [
+            error_stage_sat_phase,
+            # error_stage_sat2user_dist,
+            error_stage_steering_cos,
+        ]
 
         self.update()
 
     def _set_params(
             self,
     ) -> None:
+        """
+        Sets name and default parameters of the error model from the error model registry
+        """
+
+        registry_entry = ERROR_MODEL_REGISTRY[self.error_model]
 
-        # NO ERROR MODEL
-        #  This is a dummy error model
-        if self.error_model == los_channel_error_model_no_error:
-            self.error_model_name = 'err_no'
-
-        # MULTIPLICATIVE ERROR MODEL
-        #  In this case, the error is not directly added to the AODs but uniformly
-        #  distributed on the cos(aods)
-        if self.error_model == los_channel_error_model_multiplicative_on_cos:
-            self.error_model_name: str = 'err_mult_on_steering_cos'
-            self.uniform_error_interval: dict = {
-                'low': -0.0,
-                'high': 0.0,
-            }
-
-        # SAT2USER DISTANCE ERROR MODEL
-        #  This error model calculates an erroneous channel state information estimate based on a
-        #  perturbed satellite to user distance estimate.
-        if self.error_model == los_channel_error_model_in_sat2user_dist:
-            self.error_model_name: str = 'err_sat2userdist'
-            self.distance_error_std: float = 0/100_000_000  # zB 1/100_000_000, 2/100_000_000..
-
-        # SAT AND USER POSITION ERROR MODEL
-        # This error model models unknown phase shifts between satellites + unkown user positions TODO
-        if self.error_model == los_channel_error_model_in_sat_and_user_pos:
-            self.error_model_name: str = 'err_satpos_and_userpos'
-            self.phase_sat_error_std: float = 0.005
-            self.uniform_error_interval: dict = {
-                'low': -0.1,
-                'high': 0.1,
-            }
+        self.error_model_name: str = registry_entry['name']
+        if self.error_model == los_channel_error_model_pipeline:
+            self.error_model_name += '_' + '_'.join(
+                ERROR_STAGE_REGISTRY[error_stage]['name'] for error_stage in self.error_stages)
+
+        for parameter in self.get_parameters():
+            setattr(self, parameter.name, parameter.to_config_value(parameter.default))
 
         # Normal distributed directly on AODs ??? TODO
 
+    def get_parameters(
+            self,
+    ) -> list:
+        """
+        The ErrorParameters of the error model, for the pipeline those of its stages
+        """
+
+        if self.error_model == los_channel_error_model_pipeline:
+            parameters = {}
+            for error_stage in self.error_stages:
+                for parameter in ERROR_STAGE_REGISTRY[error_stage]['parameters']:
+                    parameters.setdefault(parameter.name, parameter)
+            return list(parameters.values())
+
+        return ERROR_MODEL_REGISTRY[self.error_model]['parameters']
+
+    def set_parameter(
+            self,
+            name: str,
+            value,
+    ) -> None:
+        """
+        Sets a parameter of the error model to a scalar or to one value per realization (batch_size,)
+        """
+
+        for parameter in self.get_parameters():
+            if parameter.name == name:
+                setattr(self, parameter.name, parameter.to_config_value(value))
+                return
+
+        raise ValueError(f'Unknown parameter {name} of error model {self.error_model_name}')
+
+    def set_sweep_value(
+            self,
+            value,
+    ) -> None:
+        """
+        Sets the swept parameter of the error model, its first parameter
+        """
+
+        parameters = self.get_parameters()
+        if not parameters:
+            raise ValueError(f'Error model {self.error_model_name} has no parameters to sweep')
+
+        self.set_parameter(name=parameters[0].name, value=value)
+
     def update(self):
         self._set_params()
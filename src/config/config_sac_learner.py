@@ -67,6 +67,8 @@ class ConfigSACLearner:
         # TRAINING
         self.training_episodes: int = 3_000  # a new episode is a full reset of the simulation environment
         self.training_steps_per_episode: int = 1_000
+        self.training_env_nr: int = 1  # scenario copies stepped in lockstep, each step adds one experience per copy
+        self.training_env_worker_nr: int = 0  # 0 = step all copies in the learner process, else worker processes sharing the copies
 
         self.train_policy_every_k_steps: int = 1  # train policy only every k steps to give value approx. time to settle
         self.train_policy_after_j_steps: int = 0  # start training policy only after value approx. starts being sensible
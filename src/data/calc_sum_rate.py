@@ -1,8 +1,18 @@
 
 from numpy import (
+    ndarray,
     matmul,
     zeros,
     log2,
+    asarray,
+)
+from scipy.sparse import (
+    issparse,
+)
+
+from src.utils.kernel_backend import (
+    use_jit_kernels,
+    jit_kernel,
 )
 
 
@@ -13,11 +23,31 @@ def calc_sum_rate(
 ) -> float:
     """
     TODO: comment
+    With the numba kernel backend, a compiled kernel is used.
+    A sparse channel_state (e.g., visibility pruned) is precoded for all users in one sparse product.
+    A channel_state ... x user_nr x tot_antenna_nr with a precoder ... x tot_antenna_nr x user_nr
+    (e.g., per subcarrier) is evaluated batched, returning one sum rate per leading index.
+    noise_power_watt is the noise in the bandwidth of one channel, for per subcarrier rates
+    config.subcarrier_noise_power_watt.
     """
 
+    if issparse(channel_state) or channel_state.ndim > 2:
+        if issparse(channel_state):
+            power_fading_precoded = abs(asarray(channel_state @ w_precoder)) ** 2  # user x precoder user
+        else:
+            power_fading_precoded = abs(matmul(channel_state, w_precoder)) ** 2  # ... x user x precoder user
+        power_fading_precoded_sigma_x = power_fading_precoded.diagonal(axis1=-2, axis2=-1)
+        sum_power_fading_precoded_other_users_sigma_int = power_fading_precoded.sum(axis=-1) - power_fading_precoded_sigma_x
+        sinr_users = power_fading_precoded_sigma_x / (noise_power_watt + sum_power_fading_precoded_other_users_sigma_int)
+
+        return log2(1 + sinr_users).sum(axis=-1)
+
+    if use_jit_kernels():
+        return _calc_sum_rate_kernel(channel_state, w_precoder, noise_power_watt)
+
     user_nr = channel_state.shape[0]
 
-    sinr_users = zeros(user_nr)
+    sinr_users = zeros(user_nr, dtype=channel_state.real.dtype)
 
     for user_idx in range(user_nr):
         channel_user_H_k = channel_state[user_idx, :]
@@ -38,3 +68,33 @@ def calc_sum_rate(
     sum_rate = sum(info_rate_users)
 
     return sum_rate
+
+
+@jit_kernel
+def _calc_sum_rate_kernel(
+        channel_state: ndarray,
+        w_precoder: ndarray,
+        noise_power_watt: float,
+) -> float:
+
+    user_nr = channel_state.shape[0]
+
+    sum_rate = 0.0
+    for user_idx in range(user_nr):
+        power_fading_precoded_sigma_x = 0.0
+        sum_power_fading_precoded_other_users_sigma_int = 0.0
+
+        for precoder_user_idx in range(user_nr):
+            precoded_channel = 0j
+            for antenna_idx in range(channel_state.shape[1]):
+                precoded_channel += channel_state[user_idx, antenna_idx] * w_precoder[antenna_idx, precoder_user_idx]
+
+            if precoder_user_idx == user_idx:
+                power_fading_precoded_sigma_x = abs(precoded_channel) ** 2
+            else:
+                sum_power_fading_precoded_other_users_sigma_int += abs(precoded_channel) ** 2
+
+        sinr_user = power_fading_precoded_sigma_x / (noise_power_watt + sum_power_fading_precoded_other_users_sigma_int)
+        sum_rate += log2(1 + sinr_user)
+
+    return sum_rate
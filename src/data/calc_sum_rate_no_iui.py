@@ -3,6 +3,10 @@ from numpy import (
     zeros,
     matmul,
     log2,
+    asarray,
+)
+from scipy.sparse import (
+    issparse,
 )
 
 
@@ -11,10 +15,25 @@ def calc_sum_rate_no_iui(
         w_precoder,
         noise_power_watt
 ):
+    """
+    A sparse channel_state (e.g., visibility pruned) is precoded for all users in one sparse product.
+    A channel_state ... x user_nr x tot_antenna_nr with a precoder ... x tot_antenna_nr x user_nr
+    (e.g., per realization) is evaluated batched, returning one sum rate per leading index.
+    """
+
+    if issparse(channel_state) or channel_state.ndim > 2:
+        if issparse(channel_state):
+            precoded_channel = asarray(channel_state @ w_precoder)  # user x precoder user
+        else:
+            precoded_channel = matmul(channel_state, w_precoder)  # ... x user x precoder user
+        sigma_x = abs(precoded_channel.diagonal(axis1=-2, axis2=-1)) ** 2  # ... x user
+        sinr_users = sigma_x / noise_power_watt
+
+        return log2(1 + sinr_users).mean(axis=-1)
 
     user_nr = channel_state.shape[0]
 
-    sinr_users = zeros(user_nr)
+    sinr_users = zeros(user_nr, dtype=channel_state.real.dtype)
 
     for user_id in range(user_nr):
 
@@ -25,7 +44,7 @@ def calc_sum_rate_no_iui(
 
         sinr_users[user_id] = sigma_x / (noise_power_watt + sigma_int)
 
-    info_rate = zeros(user_nr)
+    info_rate = zeros(user_nr, dtype=channel_state.real.dtype)
 
     for user_id in range(user_nr):
 
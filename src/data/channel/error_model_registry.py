@@ -0,0 +1,137 @@
+
+from numpy import (
+    asarray,
+    newaxis,
+)
+
+from src.data.channel.los_channel_error_model_no_error import (
+    los_channel_error_model_no_error,
+)
+from src.data.channel.los_channel_error_model_multiplicative_on_cos import (
+    los_channel_error_model_multiplicative_on_cos,
+)
+from src.data.channel.los_channel_error_model_in_sat2user_dist import (
+    los_channel_error_model_in_sat2user_dist,
+)
+from src.data.channel.los_channel_error_model_in_sat_and_user_pos import (
+    los_channel_error_model_in_sat_and_user_pos,
+)
+from src.data.channel.los_channel_error_model_pipeline import (
+    los_channel_error_model_pipeline,
+)
+from src.data.channel.los_channel_error_stages import (
+    error_stage_sat_phase,
+    error_stage_sat2user_dist,
+    error_stage_steering_cos,
+)
+
+
+class ErrorParameter:
+    """
+    Declares a parameter of an error model, its attribute name on the error model config,
+    the distribution it parametrizes and its default magnitude:
+        'uniform': symmetric interval {'low': -value, 'high': value}
+        'normal': standard deviation value
+    A value is a scalar, or an array with one value per realization (batch_size,), which broadcasts
+    over users and satellites, such that every realization of a batch carries its own magnitude.
+    """
+
+    def __init__(
+            self,
+            name: str,
+            distribution: str,
+            default: float,
+    ) -> None:
+
+        if distribution not in ('uniform', 'normal'):
+            raise ValueError(f'Unknown distribution {distribution}')
+
+        self.name: str = name
+        self.distribution: str = distribution
+        self.default: float = default
+
+    def to_config_value(
+            self,
+            value,
+    ):
+
+        if asarray(value).ndim > 0:
+            value = asarray(value)[:, newaxis, newaxis]  # batch_size x user x sat
+
+        if self.distribution == 'uniform':
+            return {'low': -1 * value, 'high': value}
+
+        return value
+
+
+# Error models and their parameters, the first parameter is the one swept by the sweep scripts.
+# Every error model takes a channel_state ... x user_nr x tot_antenna_nr and draws one error per
+# satellite/user pair. wavelength defaults to constellation_state.wavelength, subcarrier wavelengths
+# subcarrier_nr x 1 x 1 apply the same errors on every subcarrier. The result is written into out if given.
+ERROR_MODEL_REGISTRY: dict = {
+
+    # NO ERROR MODEL
+    #  This is a dummy error model
+    los_channel_error_model_no_error: {
+        'name': 'err_no',
+        'parameters': [],
+    },
+
+    # MULTIPLICATIVE ERROR MODEL
+    #  In this case, the error is not directly added to the AODs but uniformly
+    #  distributed on the cos(aods)
+    los_channel_error_model_multiplicative_on_cos: {
+        'name': 'err_mult_on_steering_cos',
+        'parameters': [
+            ErrorParameter(name='uniform_error_interval', distribution='uniform', default=0.0),
+        ],
+    },
+
+    # SAT2USER DISTANCE ERROR MODEL
+    #  This error model calculates an erroneous channel state information estimate based on a
+    #  perturbed satellite to user distance estimate.
+    los_channel_error_model_in_sat2user_dist: {
+        'name': 'err_sat2userdist',
+        'parameters': [
+            ErrorParameter(name='distance_error_std', distribution='normal', default=0/100_000_000),  # zB 1/100_000_000, 2/100_000_000..
+        ],
+    },
+
+    # SAT AND USER POSITION ERROR MODEL
+    # This error model models unknown phase shifts between satellites + unkown user positions TODO
+    los_channel_error_model_in_sat_and_user_pos: {
+        'name': 'err_satpos_and_userpos',
+        'parameters': [
+            ErrorParameter(name='phase_sat_error_std', distribution='normal', default=0.005),
+            ErrorParameter(name='uniform_error_interval', distribution='uniform', default=0.1),
+        ],
+    },
+
+    # PIPELINE ERROR MODEL
+    #  Combines error stages, the parameters are those of its stages
+    los_channel_error_model_pipeline: {
+        'name': 'err_pipeline',
+        'parameters': None,
+    },
+}
+
+ERROR_STAGE_REGISTRY: dict = {
+    error_stage_sat_phase: {
+        'name': 'sat_phase',
+        'parameters': [
+            ErrorParameter(name='phase_sat_error_std', distribution='normal', default=0.005),
+        ],
+    },
+    error_stage_sat2user_dist: {
+        'name': 'sat2user_dist',
+        'parameters': [
+            ErrorParameter(name='distance_error_std', distribution='normal', default=0.0),
+        ],
+    },
+    error_stage_steering_cos: {
+        'name': 'steering_cos',
+        'parameters': [
+            ErrorParameter(name='uniform_error_interval', distribution='uniform', default=0.1),
+        ],
+    },
+}
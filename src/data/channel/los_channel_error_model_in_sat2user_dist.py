@@ -1,47 +1,84 @@
 
 from numpy import (
     ndarray,
-    zeros,
-    sqrt,
+    cos,
+    sin,
+    multiply,
     exp,
     pi,
 )
 
+from src.data.constellation_state import (
+    ConstellationState,
+)
+from src.utils.kernel_backend import (
+    use_jit_kernels,
+    jit_kernel,
+)
+
 
 def los_channel_error_model_in_sat2user_dist(
         error_model_config,
-        satellite,
-        users: list,
+        constellation_state: ConstellationState,
+        channel_state: ndarray,
+        rng,
+        out: ndarray = None,
+        wavelength: float = None,
 ) -> ndarray:
     """
     This error model calculates an erroneous channel state information estimate based on a
-    perturbed sat2user distance estimate.
+    perturbed sat2user distance estimate d_est = d * N(1, std).
+    The channel state is rescaled by d / d_est and shifted by 2 pi (d_est - d) / wavelength
+    instead of evaluating the LOS channel model again for d_est.
     """
 
-    erroneous_channel_state_to_users = zeros((len(users), satellite.antenna_nr), dtype='complex')
+    if wavelength is None:
+        wavelength = constellation_state.wavelength
 
-    for user in users:
+    distances = constellation_state.distances
 
-        # Perturb the satellite-to-user distance according to config
-        satellite_to_user_distance_estimate = (
-                satellite.distance_to_users[user.idx]
-                * satellite.rng.normal(loc=1, scale=error_model_config.distance_error_std)
-        )
+    # Perturb the satellite-to-user distances according to config
+    distance_error_factor = rng.normal(loc=1, scale=error_model_config.distance_error_std, size=distances.shape)
+    distance_error = distances * (distance_error_factor - 1)
 
-        # Calculate channel state estimation based on the perturbed distance estimate
-        power_ratio = (
-                satellite.antenna_gain_linear
-                * user.gain_linear
-                * (satellite.wavelength / (4 * pi * satellite_to_user_distance_estimate)) ** 2
+    if use_jit_kernels() and out is not None and out.ndim == 2:
+        _distance_error_kernel(
+            channel_state,
+            constellation_state.antenna_sat_idx,
+            distance_error_factor,
+            distance_error,
+            wavelength,
+            out,
         )
-        amplitude_damping = sqrt(power_ratio)
+        return out
 
-        phase_shift = satellite_to_user_distance_estimate % satellite.wavelength * 2 * pi / satellite.wavelength
+    channel_state_error = (
+        1 / distance_error_factor
+        * exp(1j * 2 * pi / wavelength * distance_error)
+    ).astype(channel_state.dtype, copy=False)
 
-        erroneous_channel_state_to_users[user.idx, :] = (
-            amplitude_damping
-            * exp(1j * phase_shift)
-            * satellite.steering_vectors_to_users[user.idx]
-        )
+    erroneous_channel_state = multiply(
+        channel_state,
+        channel_state_error[..., constellation_state.antenna_sat_idx],
+        out=out,
+    )
+
+    return erroneous_channel_state
+
+
+@jit_kernel
+def _distance_error_kernel(
+        channel_state: ndarray,
+        antenna_sat_idx: ndarray,
+        distance_error_factor: ndarray,
+        distance_error: ndarray,
+        wavelength: float,
+        out: ndarray,
+) -> None:
 
-    return erroneous_channel_state_to_users
+    for user_idx in range(channel_state.shape[0]):
+        for antenna_idx in range(channel_state.shape[1]):
+            sat_idx = antenna_sat_idx[antenna_idx]
+            phase = 2 * pi / wavelength * distance_error[user_idx, sat_idx]
+            channel_state_error = 1 / distance_error_factor[user_idx, sat_idx] * (cos(phase) + 1j * sin(phase))
+            out[user_idx, antenna_idx] = channel_state[user_idx, antenna_idx] * channel_state_error
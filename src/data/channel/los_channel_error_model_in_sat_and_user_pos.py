@@ -1,60 +1,94 @@
+
 from numpy import (
     ndarray,
-    array,
-    arange,
-    newaxis,
-    zeros,
-    sqrt,
+    cos,
+    sin,
+    multiply,
     exp,
     pi,
 )
 
-from src.data.satellite import (
-    Satellite,
+from src.data.constellation_state import (
+    ConstellationState,
+)
+from src.utils.kernel_backend import (
+    use_jit_kernels,
+    jit_kernel,
 )
 
 
 def los_channel_error_model_in_sat_and_user_pos(
         error_model_config,
-        satellite: Satellite,
-        users: list,
+        constellation_state: ConstellationState,
+        channel_state: ndarray,
+        rng,
+        out: ndarray = None,
+        wavelength: float = None,
 ) -> ndarray:
     """
-    TODO: describe this
+    Models unknown phase shifts between satellites, normal distributed per satellite and user,
+    plus unknown user positions as a uniform error on the steering cos(aods).
     """
 
-    channel_state_information = zeros((len(users), satellite.antenna_nr), dtype='complex')
-    for user in users:
+    if wavelength is None:
+        wavelength = constellation_state.wavelength
 
-        power_ratio = (
-                satellite.antenna_gain_linear
-                * user.gain_linear
-                * (satellite.wavelength / (4 * pi * satellite.distance_to_users[user.idx])) ** 2
-        )
-        amplitude_damping = sqrt(power_ratio)
+    error_shape = constellation_state.distances.shape  # ... x user_nr x sat_nr
 
-        phase_shift = satellite.distance_to_users[user.idx] % satellite.wavelength * 2 * pi / satellite.wavelength
-        phase_shift_error = 2 * pi / satellite.wavelength * satellite.rng.normal(loc=0, scale=error_model_config.phase_sat_error_std)
+    phase_shift_error = (
+        2 * pi / wavelength
+        * rng.normal(loc=0, scale=error_model_config.phase_sat_error_std, size=error_shape)
+    )
 
-        channel_state_information[user.idx, :] = (
-            amplitude_damping
-            * exp(1j * phase_shift) 
-            * exp(1j * phase_shift_error)
-            * satellite.steering_vectors_to_users[user.idx]
-        )
+    steering_cos_error = rng.uniform(low=error_model_config.uniform_error_interval['low'],
+                                     high=error_model_config.uniform_error_interval['high'],
+                                     size=error_shape)
 
-    # calculate indices for steering vectors
-    steering_idx = arange(0, satellite.antenna_nr) - (satellite.antenna_nr - 1) / 2
+    if use_jit_kernels() and out is not None and out.ndim == 2:
+        _phase_and_steering_error_kernel(
+            channel_state,
+            phase_shift_error,
+            constellation_state.antenna_sat_idx,
+            constellation_state.antenna_steering_idx,
+            2 * pi / wavelength * constellation_state.antenna_distance,
+            steering_cos_error,
+            out,
+        )
+        return out
 
     steering_error = exp(
-        steering_idx * (
-            1j * 2 * pi / satellite.wavelength
-            * satellite.antenna_distance
-            * satellite.rng.uniform(low=error_model_config.uniform_error_interval['low'],
-                                    high=error_model_config.uniform_error_interval['high'],
-                                    size=(len(users), 1))
-        )
+        constellation_state.antenna_steering_idx * (
+            1j * 2 * pi / wavelength
+            * constellation_state.antenna_distance
+            * steering_cos_error
+        )[..., constellation_state.antenna_sat_idx]
     )
-    erroneous_channel_state_to_users = channel_state_information * steering_error
+    channel_state_error = (
+        exp(1j * phase_shift_error)[..., constellation_state.antenna_sat_idx]
+        * steering_error
+    ).astype(channel_state.dtype, copy=False)
+
+    erroneous_channel_state = multiply(channel_state, channel_state_error, out=out)
+
+    return erroneous_channel_state
+
+
+@jit_kernel
+def _phase_and_steering_error_kernel(
+        channel_state: ndarray,
+        phase_shift_error: ndarray,
+        antenna_sat_idx: ndarray,
+        antenna_steering_idx: ndarray,
+        phase_factor: float,
+        steering_cos_error: ndarray,
+        out: ndarray,
+) -> None:
 
-    return erroneous_channel_state_to_users
+    for user_idx in range(channel_state.shape[0]):
+        for antenna_idx in range(channel_state.shape[1]):
+            sat_idx = antenna_sat_idx[antenna_idx]
+            phase = (
+                phase_shift_error[user_idx, sat_idx]
+                + antenna_steering_idx[antenna_idx] * (phase_factor * steering_cos_error[user_idx, sat_idx])
+            )
+            out[user_idx, antenna_idx] = channel_state[user_idx, antenna_idx] * (cos(phase) + 1j * sin(phase))
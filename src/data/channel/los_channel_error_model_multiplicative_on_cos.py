@@ -1,36 +1,79 @@
 
 from numpy import (
     ndarray,
-    arange,
+    cos,
+    sin,
+    multiply,
     exp,
     pi,
 )
 
+from src.data.constellation_state import (
+    ConstellationState,
+)
+from src.utils.kernel_backend import (
+    use_jit_kernels,
+    jit_kernel,
+)
+
 
 def los_channel_error_model_multiplicative_on_cos(
         error_model_config,
-        satellite,
-        users: list,
+        constellation_state: ConstellationState,
+        channel_state: ndarray,
+        rng,
+        out: ndarray = None,
+        wavelength: float = None,
 ) -> ndarray:
     """
-    TODO: erklären
+    The error is not directly added to the AODs but uniformly distributed on the cos(aods),
+    i.e., one error value per satellite and user, applied to the steering part of the channel.
     NOTE: With this error model, satellites with ODD number of antennas will always
         have zero error on the middle antenna. Learning algorithms can exploit this to
         ignore the error.
     """
 
-    # calculate indices for steering vectors
-    steering_idx = arange(0, satellite.antenna_nr) - (satellite.antenna_nr - 1) / 2
+    if wavelength is None:
+        wavelength = constellation_state.wavelength
 
-    steering_error = exp(
-        steering_idx * (
-            1j * 2 * pi / satellite.wavelength
-            * satellite.antenna_distance
-            * satellite.rng.uniform(low=error_model_config.uniform_error_interval['low'],
-                                    high=error_model_config.uniform_error_interval['high'],
-                                    size=(len(users), 1))
+    steering_cos_error = rng.uniform(low=error_model_config.uniform_error_interval['low'],
+                                     high=error_model_config.uniform_error_interval['high'],
+                                     size=constellation_state.distances.shape)
+
+    if use_jit_kernels() and out is not None and out.ndim == 2:
+        _steering_error_kernel(
+            channel_state,
+            constellation_state.antenna_sat_idx,
+            constellation_state.antenna_steering_idx,
+            2 * pi / wavelength * constellation_state.antenna_distance,
+            steering_cos_error,
+            out,
         )
-    )
-    erroneous_channel_state_to_users = satellite.channel_state_to_users * steering_error
+        return out
+
+    steering_error = exp(
+        constellation_state.antenna_steering_idx * (
+            1j * 2 * pi / wavelength
+            * constellation_state.antenna_distance
+            * steering_cos_error
+        )[..., constellation_state.antenna_sat_idx]
+    ).astype(channel_state.dtype, copy=False)
+    erroneous_channel_state = multiply(channel_state, steering_error, out=out)
+
+    return erroneous_channel_state
+
+
+@jit_kernel
+def _steering_error_kernel(
+        channel_state: ndarray,
+        antenna_sat_idx: ndarray,
+        antenna_steering_idx: ndarray,
+        phase_factor: float,
+        steering_cos_error: ndarray,
+        out: ndarray,
+) -> None:
 
-    return erroneous_channel_state_to_users
+    for user_idx in range(channel_state.shape[0]):
+        for antenna_idx in range(channel_state.shape[1]):
+            phase = antenna_steering_idx[antenna_idx] * (phase_factor * steering_cos_error[user_idx, antenna_sat_idx[antenna_idx]])
+            out[user_idx, antenna_idx] = channel_state[user_idx, antenna_idx] * (cos(phase) + 1j * sin(phase))
@@ -1,8 +1,21 @@
 
+from numpy import (
+    ndarray,
+)
+
+
 def los_channel_error_model_no_error(
         error_model_config,
-        satellite,
-        users: list,
-) -> None:
+        constellation_state,
+        channel_state: ndarray,
+        rng,
+        out: ndarray = None,
+        wavelength: float = None,
+) -> ndarray:
+
+    if out is None:
+        return channel_state
+
+    out[...] = channel_state
 
-    return satellite.channel_state_to_users
+    return out
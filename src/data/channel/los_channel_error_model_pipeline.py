@@ -0,0 +1,102 @@
+
+from numpy import (
+    ndarray,
+    ones,
+    zeros,
+    shape,
+    broadcast_shapes,
+    cos,
+    sin,
+    exp,
+    multiply,
+)
+
+from src.data.constellation_state import (
+    ConstellationState,
+)
+from src.utils.kernel_backend import (
+    use_jit_kernels,
+    jit_kernel,
+)
+
+
+def los_channel_error_model_pipeline(
+        error_model_config,
+        constellation_state: ConstellationState,
+        channel_state: ndarray,
+        rng,
+        out: ndarray = None,
+        wavelength: float = None,
+) -> ndarray:
+    """
+    Combines the error stages in error_model_config.error_stages (see los_channel_error_stages).
+    The stages accumulate per satellite/user pair error terms, which are applied to the
+    channel state in one pass
+        h_err = h * amplitude * exp(j * (phase + antenna_steering_idx * steering_phase)).
+    """
+
+    if wavelength is None:
+        wavelength = constellation_state.wavelength
+
+    error_shape = constellation_state.distances.shape  # ... x user_nr x sat_nr
+    phase_shape = broadcast_shapes(shape(wavelength), error_shape)
+
+    error_terms: dict = {
+        'amplitude': ones(error_shape),
+        'phase': zeros(phase_shape),
+        'steering_phase': zeros(phase_shape),
+    }
+    for error_stage in error_model_config.error_stages:
+        error_stage(
+            error_model_config=error_model_config,
+            constellation_state=constellation_state,
+            rng=rng,
+            error_terms=error_terms,
+            wavelength=wavelength,
+        )
+
+    if use_jit_kernels() and out is not None and out.ndim == 2:
+        _fused_error_kernel(
+            channel_state,
+            constellation_state.antenna_sat_idx,
+            constellation_state.antenna_steering_idx,
+            error_terms['amplitude'],
+            error_terms['phase'],
+            error_terms['steering_phase'],
+            out,
+        )
+        return out
+
+    antenna_sat_idx = constellation_state.antenna_sat_idx
+    channel_state_error = (
+        error_terms['amplitude'][..., antenna_sat_idx]
+        * exp(1j * (
+            error_terms['phase'][..., antenna_sat_idx]
+            + constellation_state.antenna_steering_idx * error_terms['steering_phase'][..., antenna_sat_idx]
+        ))
+    ).astype(channel_state.dtype, copy=False)
+
+    erroneous_channel_state = multiply(channel_state, channel_state_error, out=out)
+
+    return erroneous_channel_state
+
+
+@jit_kernel
+def _fused_error_kernel(
+        channel_state: ndarray,
+        antenna_sat_idx: ndarray,
+        antenna_steering_idx: ndarray,
+        amplitude: ndarray,
+        phase: ndarray,
+        steering_phase: ndarray,
+        out: ndarray,
+) -> None:
+
+    for user_idx in range(channel_state.shape[0]):
+        for antenna_idx in range(channel_state.shape[1]):
+            sat_idx = antenna_sat_idx[antenna_idx]
+            antenna_phase = phase[user_idx, sat_idx] + antenna_steering_idx[antenna_idx] * steering_phase[user_idx, sat_idx]
+            out[user_idx, antenna_idx] = (
+                channel_state[user_idx, antenna_idx]
+                * amplitude[user_idx, sat_idx] * (cos(antenna_phase) + 1j * sin(antenna_phase))
+            )
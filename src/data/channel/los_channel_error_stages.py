@@ -0,0 +1,66 @@
+
+from numpy import (
+    pi,
+)
+
+
+# Error stages for los_channel_error_model_pipeline. Every stage draws its errors for all
+#  satellite/user pairs in one call and accumulates them into the per pair error terms
+#   amplitude: factor on the channel
+#   phase: phase shift in rad
+#   steering_phase: phase shift in rad per antenna index of the satellite's ULA
+#  which the pipeline applies to the channel state in one fused pass. Errors are drawn per
+#  satellite/user pair, the phase terms may carry a leading subcarrier axis from wavelength.
+
+
+def error_stage_sat_phase(
+        error_model_config,
+        constellation_state,
+        rng,
+        error_terms: dict,
+        wavelength: float,
+) -> None:
+    """
+    Unknown phase shifts between satellites, normal distributed per satellite and user
+    """
+
+    error_terms['phase'] += (
+        2 * pi / wavelength
+        * rng.normal(loc=0, scale=error_model_config.phase_sat_error_std, size=constellation_state.distances.shape)
+    )
+
+
+def error_stage_sat2user_dist(
+        error_model_config,
+        constellation_state,
+        rng,
+        error_terms: dict,
+        wavelength: float,
+) -> None:
+    """
+    Perturbed satellite to user distance estimate d_est = d * N(1, std), changes amplitude d / d_est
+    and phase 2 pi (d_est - d) / wavelength
+    """
+
+    distance_error_factor = rng.normal(loc=1, scale=error_model_config.distance_error_std, size=constellation_state.distances.shape)
+
+    error_terms['amplitude'] /= distance_error_factor
+    error_terms['phase'] += 2 * pi / wavelength * constellation_state.distances * (distance_error_factor - 1)
+
+
+def error_stage_steering_cos(
+        error_model_config,
+        constellation_state,
+        rng,
+        error_terms: dict,
+        wavelength: float,
+) -> None:
+    """
+    Uniform error on the steering cos(aods), e.g., from unknown user positions
+    """
+
+    steering_cos_error = rng.uniform(low=error_model_config.uniform_error_interval['low'],
+                                     high=error_model_config.uniform_error_interval['high'],
+                                     size=constellation_state.distances.shape)
+
+    error_terms['steering_phase'] += 2 * pi / wavelength * constellation_state.antenna_distance * steering_cos_error
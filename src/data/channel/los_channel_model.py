@@ -1,43 +1,86 @@
 
 from numpy import (
     ndarray,
-    array,
+    cos,
+    sin,
     newaxis,
-    zeros,
+    multiply,
     sqrt,
     exp,
     pi,
+    empty,
+    complex128,
 )
 
-from src.data.satellite import (
-    Satellite,
+from src.utils.kernel_backend import (
+    use_jit_kernels,
+    jit_kernel,
 )
 
 
 def los_channel_model(
-        satellite: Satellite,
-        users: list,
+        distances: ndarray,
+        steering_vectors: ndarray,
+        antenna_sat_idx: ndarray,
+        wavelength: float,
+        antenna_gain_linear: float,
+        user_gain_linear: ndarray,
+        out: ndarray = None,
 ) -> ndarray:
     """
-    TODO: describe this
+    Line of sight channel between all satellite antennas and users in one broadcast:
+        h = sqrt(G_ant * G_user * (wavelength / (4 pi d))^2) * exp(j * 2 pi (d mod wavelength) / wavelength) * steering
+
+    distances: ... x user_nr x sat_nr
+    steering_vectors: ... x user_nr x tot_antenna_nr
+    antenna_sat_idx: satellite of every antenna column
+    wavelength: a float, or subcarrier_nr x 1 x 1 for a multicarrier channel
+    returns the global channel state information matrix ... x user_nr x tot_antenna_nr
     """
 
-    channel_state_information = zeros((len(users), satellite.antenna_nr), dtype='complex')
-    for user in users:
-        power_ratio = (
-                satellite.antenna_gain_linear
-                * user.gain_linear
-                * (satellite.wavelength / (4 * pi * satellite.distance_to_users[user.idx])) ** 2
-        )
-        amplitude_damping = sqrt(power_ratio)
+    if use_jit_kernels() and out is not None and out.ndim == 2:
+        _los_channel_model_kernel(
+            distances, steering_vectors, antenna_sat_idx, wavelength, antenna_gain_linear, user_gain_linear, out)
+        return out
+
+    power_ratio = (
+            antenna_gain_linear
+            * user_gain_linear[:, newaxis]
+            * (wavelength / (4 * pi * distances)) ** 2
+    )
+    amplitude_damping = sqrt(power_ratio)
+
+    phase_shift = distances % wavelength * 2 * pi / wavelength
+
+    channel_coefficient = amplitude_damping * exp(1j * phase_shift)
+    if out is not None:
+        channel_coefficient = channel_coefficient.astype(out.dtype, copy=False)  # avoid upcasting the full tensor
+
+    return multiply(channel_coefficient[..., antenna_sat_idx], steering_vectors, out=out)
 
-        phase_shift = satellite.distance_to_users[user.idx] % satellite.wavelength * 2 * pi / satellite.wavelength
 
-        channel_state_information[user.idx, :] = (
-            amplitude_damping
-            * exp(1j * phase_shift)
-            * satellite.steering_vectors_to_users[user.idx]
-        )
+@jit_kernel
+def _los_channel_model_kernel(
+        distances: ndarray,
+        steering_vectors: ndarray,
+        antenna_sat_idx: ndarray,
+        wavelength: float,
+        antenna_gain_linear: float,
+        user_gain_linear: ndarray,
+        out: ndarray,
+) -> None:
 
-    return channel_state_information
+    channel_coefficients = empty(distances.shape[1], dtype=complex128)
 
+    for user_idx in range(distances.shape[0]):
+        for sat_idx in range(distances.shape[1]):
+            distance = distances[user_idx, sat_idx]
+            amplitude_damping = sqrt(
+                antenna_gain_linear
+                * user_gain_linear[user_idx]
+                * (wavelength / (4 * pi * distance)) ** 2
+            )
+            phase_shift = distance % wavelength * 2 * pi / wavelength
+            channel_coefficients[sat_idx] = amplitude_damping * (cos(phase_shift) + 1j * sin(phase_shift))
+        for antenna_idx in range(steering_vectors.shape[1]):
+            out[user_idx, antenna_idx] = channel_coefficients[antenna_sat_idx[antenna_idx]] * steering_vectors[user_idx, antenna_idx]
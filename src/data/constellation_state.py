@@ -0,0 +1,677 @@
+
+from numpy import (
+    ndarray,
+    zeros,
+    ones,
+    full,
+    arange,
+    flatnonzero,
+    newaxis,
+    where,
+    add,
+    subtract,
+    multiply,
+    divide,
+    sqrt,
+    pi,
+    exp,
+    sin,
+    cos,
+    arcsin,
+    repeat,
+    concatenate,
+    array,
+    broadcast_arrays,
+)
+
+from src.data.steering_vector_cache import (
+    SteeringVectorCache,
+)
+from src.utils.spherical_to_cartesian_coordinates import (
+    spherical_to_cartesian_coordinates,
+)
+from src.utils.euclidian_distance import (
+    euclidian_distance,
+)
+from src.utils.get_antenna_layout import (
+    get_antenna_layout,
+)
+from src.utils.kernel_backend import (
+    use_jit_kernels,
+    jit_kernel,
+)
+
+
+USER_AXIS_ARRAYS: dict = {  # arrays with a user axis: its position from the end
+    'user_spherical_coordinates': -1,
+    'user_cartesian_coordinates': -1,
+    'user_gain_linear': -1,
+    'user_changed': -1,
+    '_mirrored_users': -1,
+    'distances': -2,
+    'aods': -2,
+    'visible': -2,
+    'steering_vectors': -2,
+    'channel_state': -2,
+    'erroneous_channel_state': -2,
+    '_workspace_user_sat': -2,
+    '_workspace_user_antenna': -2,
+}
+
+
+class ConstellationState:
+    """
+    Geometry and channel state of all satellites and users as contiguous arrays, updated in place
+    in one broadcast pass over satellites x users x antennas.
+        positions: 3 x sat_nr, 3 x user_nr
+        distances, aods: user_nr x sat_nr
+        steering vectors, channel state: user_nr x tot_antenna_nr, antennas laid out as in get_antenna_layout
+    Only pairs of a changed satellite or user are recomputed. Users may join and leave, see update_users.
+    With a batch_size, arrays get a batch axis after the coordinate axis, e.g., batch_size x user_nr x sat_nr.
+    Visibility and multicarrier channel states are computed by ConstellationVisibility and MulticarrierChannelState.
+    """
+
+    def __init__(
+            self,
+            sat_nr: int,
+            user_nr: int,
+            antenna_nr,
+            antenna_distance: float,
+            antenna_gain_linear: float,
+            wavelength: float,
+            center_aod_earth_deg: float,
+            batch_size: int = None,
+            steering_vector_cache_quantization: float = None,
+            steering_vector_cache_interpolation: bool = False,
+            precision: str = 'double',
+            relative_aod_side: bool = False,
+    ) -> None:
+
+        self.sat_nr: int = sat_nr
+        self.user_nr: int = user_nr
+        self.antenna_distance: float = antenna_distance
+        self.antenna_gain_linear: float = antenna_gain_linear
+        self.wavelength: float = wavelength
+        self.center_aod_earth_rad: float = center_aod_earth_deg * pi / 180
+
+        self.batch_shape: tuple = () if batch_size is None else (batch_size,)
+
+        # flat antenna layout, antenna_nr is one number for all satellites or one per satellite
+        self.antenna_nrs: ndarray = full(sat_nr, antenna_nr, dtype='int64')
+        self.antenna_sat_idx, antenna_idx = get_antenna_layout(self.antenna_nrs)
+        self.tot_antenna_nr: int = len(self.antenna_sat_idx)
+        self.antenna_steering_idx: ndarray = antenna_idx - (self.antenna_nrs[self.antenna_sat_idx] - 1) / 2  # ULA index of every antenna column
+        self.sat_antenna_columns: ndarray = full((sat_nr, self.antenna_nrs.max()), -1, dtype='int64')  # padded with -1
+        self.sat_antenna_columns[self.antenna_sat_idx, antenna_idx] = arange(self.tot_antenna_nr)
+
+        # geometry stays in double precision, float32 cannot resolve the carrier phase at orbit distances
+        if precision == 'double':
+            self.real_dtype: str = 'float64'
+            self.complex_dtype: str = 'complex128'
+        elif precision == 'single':
+            self.real_dtype: str = 'float32'
+            self.complex_dtype: str = 'complex64'
+        else:
+            raise ValueError(f'Unknown precision {precision}')
+
+        self.sat_spherical_coordinates: ndarray = zeros((3, *self.batch_shape, sat_nr))
+        self.sat_cartesian_coordinates: ndarray = zeros((3, *self.batch_shape, sat_nr))
+        self.user_spherical_coordinates: ndarray = zeros((3, *self.batch_shape, user_nr))
+        self.user_cartesian_coordinates: ndarray = zeros((3, *self.batch_shape, user_nr))
+        self.user_gain_linear: ndarray = zeros(user_nr)
+
+        self.distances: ndarray = zeros((*self.batch_shape, user_nr, sat_nr))
+        self.aods: ndarray = zeros((*self.batch_shape, user_nr, sat_nr))  # in rad
+        self.steering_vectors: ndarray = zeros((*self.batch_shape, user_nr, self.tot_antenna_nr), dtype='complex64')
+        self.visible: ndarray = ones((*self.batch_shape, user_nr, sat_nr), dtype=bool)  # see ConstellationVisibility
+
+        self.channel_state: ndarray = zeros((*self.batch_shape, user_nr, self.tot_antenna_nr), dtype=self.complex_dtype)
+        self.erroneous_channel_state: ndarray = zeros((*self.batch_shape, user_nr, self.tot_antenna_nr), dtype=self.complex_dtype)
+
+        # optional lookup table for steering vectors, None computes them directly
+        self.steering_vector_cache: SteeringVectorCache = None
+        if steering_vector_cache_quantization is not None:
+            self.steering_vector_cache = SteeringVectorCache(
+                antenna_steering_idx=self.antenna_steering_idx,
+                antenna_distance=antenna_distance,
+                wavelength=wavelength,
+                quantization=steering_vector_cache_quantization,
+                interpolation=steering_vector_cache_interpolation,
+                dtype=self.complex_dtype,
+            )
+
+        # change tracking, only pairs of changed satellites or users are recomputed
+        self.sat_changed: ndarray = ones(sat_nr, dtype=bool)
+        self.user_changed: ndarray = ones(user_nr, dtype=bool)
+        self.pair_updates_computed: int = 0
+        self.pair_updates_skipped: int = 0
+
+        # users right of the center by their slot in the user list, mirrored in the AOD calculation,
+        #  with relative_aod_side users right of the satellite by their azimuth instead
+        self._mirrored_users: ndarray = calc_mirrored_users(user_nr)
+        self.relative_aod_side: bool = relative_aod_side
+
+        # scratch buffers for intermediate results
+        self._workspace_user_sat: ndarray = zeros((*self.batch_shape, user_nr, sat_nr))
+        self._workspace_user_antenna: ndarray = zeros((*self.batch_shape, user_nr, self.tot_antenna_nr), dtype=self.real_dtype)
+
+        # dynamic users, user id: row, every user array is a view into a buffer of user_capacity
+        self._user_rows: dict = {user_idx: user_idx for user_idx in range(user_nr)}
+        self._user_ids: list = list(range(user_nr))  # user ids in row order
+        self.user_capacity: int = user_nr
+        self._user_buffers: dict = {name: getattr(self, name) for name in USER_AXIS_ARRAYS}
+
+    def update_satellite_positions(
+            self,
+            spherical_coordinates: ndarray,
+            cartesian_coordinates: ndarray = None,
+    ) -> None:
+        """
+        Takes precomputed cartesian coordinates if given, e.g., from a trajectory cache
+        """
+
+        self.sat_changed |= self._changed_entities(self.sat_spherical_coordinates, spherical_coordinates)
+
+        self.sat_spherical_coordinates[:] = spherical_coordinates
+        if cartesian_coordinates is None:
+            spherical_to_cartesian_coordinates(self.sat_spherical_coordinates, out=self.sat_cartesian_coordinates)
+        else:
+            self.sat_cartesian_coordinates[:] = cartesian_coordinates
+
+    def update_user_positions(
+            self,
+            spherical_coordinates: ndarray,
+    ) -> None:
+
+        self.user_changed |= self._changed_entities(self.user_spherical_coordinates, spherical_coordinates)
+
+        self.user_spherical_coordinates[:] = spherical_coordinates
+        spherical_to_cartesian_coordinates(self.user_spherical_coordinates, out=self.user_cartesian_coordinates)
+
+    def update_users(
+            self,
+            users: list,
+    ) -> None:
+        """
+        Gathers user positions and gains from a user list, unbatched only. Users are identified by
+        user.id, rows of users that moved are copied, and only users that joined, moved or changed
+        their AOD side are recomputed.
+        """
+
+        user_ids = [user.id for user in users]
+        if user_ids != self._user_ids:
+            moved_rows_from, moved_rows_to, joined_users = [], [], []
+            for user in users:
+                row = self._user_rows.get(user.id)
+                if row is None:
+                    joined_users.append(user)
+                elif row != user.idx:
+                    moved_rows_from.append(row)
+                    moved_rows_to.append(user.idx)
+
+            self._reserve_user_capacity(len(users))
+            if moved_rows_from:
+                self._move_user_rows(rows_from=moved_rows_from, rows_to=moved_rows_to)
+            self._bind_user_views(len(users))
+            self._user_rows = {user.id: user.idx for user in users}
+            self._user_ids = user_ids
+
+            for user in joined_users:
+                self.user_changed[user.idx] = True
+
+            mirrored_users = calc_mirrored_users(len(users))
+            self.user_changed |= self._mirrored_users != mirrored_users
+            self._mirrored_users[:] = mirrored_users
+
+        if not users:
+            return
+
+        spherical_coordinates = array([user.spherical_coordinates for user in users]).T  # 3 x user_nr
+        gain_linear = array([user.gain_linear for user in users])
+
+        changed_rows = flatnonzero(
+            self.user_changed
+            | (self.user_spherical_coordinates != spherical_coordinates).any(axis=0)
+            | (self.user_gain_linear != gain_linear)
+        )
+        if len(changed_rows) == 0:
+            return
+
+        self.user_changed[changed_rows] = True
+        self.user_spherical_coordinates[:, changed_rows] = spherical_coordinates[:, changed_rows]
+        self.user_cartesian_coordinates[:, changed_rows] = array(
+            [users[row].cartesian_coordinates for row in changed_rows]).T
+        self.user_gain_linear[changed_rows] = gain_linear[changed_rows]
+
+    def _reserve_user_capacity(
+            self,
+            user_nr: int,
+    ) -> None:
+        """
+        Grows all user buffers to at least user_nr users, doubling the capacity
+        """
+
+        if user_nr <= self.user_capacity:
+            return
+
+        new_capacity = max(user_nr, 2 * self.user_capacity)
+        for name, user_axis in USER_AXIS_ARRAYS.items():
+            buffer = self._user_buffers[name]
+            new_shape = list(buffer.shape)
+            new_shape[user_axis] = new_capacity
+            new_buffer = zeros(new_shape, dtype=buffer.dtype)
+            if user_axis == -1:
+                new_buffer[..., :self.user_capacity] = buffer
+            else:
+                new_buffer[..., :self.user_capacity, :] = buffer
+            self._user_buffers[name] = new_buffer
+
+        self.user_capacity = new_capacity
+        self._bind_user_views(self.user_nr)
+
+    def _move_user_rows(
+            self,
+            rows_from: list,
+            rows_to: list,
+    ) -> None:
+
+        for name, user_axis in USER_AXIS_ARRAYS.items():
+            buffer = self._user_buffers[name]
+            if user_axis == -1:
+                buffer[..., rows_to] = buffer[..., rows_from]
+            else:
+                buffer[..., rows_to, :] = buffer[..., rows_from, :]
+
+    def _bind_user_views(
+            self,
+            user_nr: int,
+    ) -> None:
+
+        self.user_nr = user_nr
+        for name, user_axis in USER_AXIS_ARRAYS.items():
+            buffer = self._user_buffers[name]
+            setattr(self, name, buffer[..., :user_nr] if user_axis == -1 else buffer[..., :user_nr, :])
+
+    def _changed_entities(
+            self,
+            old_spherical_coordinates: ndarray,
+            new_spherical_coordinates: ndarray,
+    ) -> ndarray:
+        """
+        Flags entities whose position changed in any coordinate or batch element
+        """
+
+        return (old_spherical_coordinates != new_spherical_coordinates).reshape(
+            (-1, old_spherical_coordinates.shape[-1])).any(axis=0)
+
+    def _get_changed_pairs(
+            self,
+    ) -> list:
+        """
+        Returns (user indices, satellite indices) blocks that together cover all pairs that
+        need recomputation: all users for changed satellites, changed users for the other satellites.
+        Returns None if all pairs need recomputation.
+        """
+
+        if self.sat_changed.all() or self.user_changed.all():
+            return None
+
+        all_users = arange(self.user_nr)
+        changed_sats = flatnonzero(self.sat_changed)
+        unchanged_sats = flatnonzero(~self.sat_changed)
+        changed_users = flatnonzero(self.user_changed)
+
+        changed_pairs = []
+        if len(changed_sats) > 0:
+            changed_pairs.append((all_users[:, newaxis], changed_sats))
+        if len(changed_users) > 0:
+            changed_pairs.append((changed_users[:, newaxis], unchanged_sats))
+
+        return changed_pairs
+
+    def get_mirrored(
+            self,
+            user_idx: ndarray,
+            sat_idx: ndarray,
+    ) -> ndarray:
+        """
+        Flags the pairs of the broadcastable indices user_idx, sat_idx whose AOD is mirrored:
+        by user slot, or with relative_aod_side if the user's azimuth is right of the satellite's
+        """
+
+        if not self.relative_aod_side:
+            return self._mirrored_users[user_idx]
+
+        # same index shape on both sides, such that a batch axis stays in front
+        user_idx, sat_idx = broadcast_arrays(user_idx, sat_idx)
+
+        return self.user_spherical_coordinates[2][..., user_idx] >= self.sat_spherical_coordinates[2][..., sat_idx]
+
+    def _get_antenna_columns(
+            self,
+            sat_idx: ndarray,
+    ) -> tuple[ndarray, ndarray]:
+        """
+        Returns the antenna columns of satellites sat_idx and, per column, the position of its
+        satellite in sat_idx
+        """
+
+        antenna_columns = concatenate(
+            [self.sat_antenna_columns[sat, :self.antenna_nrs[sat]] for sat in sat_idx]
+        )
+        antenna_sat_positions = repeat(arange(len(sat_idx)), self.antenna_nrs[sat_idx])
+
+        return antenna_columns, antenna_sat_positions
+
+    def calculate_geometry(
+            self,
+    ) -> None:
+        """
+        Distances, AODs and steering vectors from the current positions
+        """
+
+        self.calculate_distances()
+        self.calculate_aods()
+        self.calculate_steering_vectors()
+
+    def calculate_distances(
+            self,
+    ) -> None:
+
+        changed_pairs = self._get_changed_pairs()
+
+        # keep track of skipped work
+        pairs_computed = self.user_nr * self.sat_nr
+        if changed_pairs is not None:
+            pairs_computed = sum(user_idx.size * sat_idx.size for user_idx, sat_idx in changed_pairs)
+        self.pair_updates_computed += pairs_computed
+        self.pair_updates_skipped += self.user_nr * self.sat_nr - pairs_computed
+
+        if changed_pairs is None:
+            calc_distances(
+                sat_cartesian_coordinates=self.sat_cartesian_coordinates,
+                user_cartesian_coordinates=self.user_cartesian_coordinates,
+                out=self.distances,
+                workspace=self._workspace_user_sat,
+            )
+            return
+
+        for user_idx, sat_idx in changed_pairs:
+            self.distances[..., user_idx, sat_idx] = calc_distances(
+                sat_cartesian_coordinates=self.sat_cartesian_coordinates[..., sat_idx],
+                user_cartesian_coordinates=self.user_cartesian_coordinates[..., user_idx[:, 0]],
+            )
+
+    def calculate_aods(
+            self,
+    ) -> None:
+
+        changed_pairs = self._get_changed_pairs()
+
+        if changed_pairs is None:
+            calc_aods(
+                sat_radii=self.sat_spherical_coordinates[0],
+                user_radii=self.user_spherical_coordinates[0],
+                distances=self.distances,
+                center_aod_earth_rad=self.center_aod_earth_rad,
+                mirrored_users=self.get_mirrored(arange(self.user_nr)[:, newaxis], arange(self.sat_nr)),
+                out=self.aods,
+                workspace=self._workspace_user_sat,
+            )
+            return
+
+        for user_idx, sat_idx in changed_pairs:
+            self.aods[..., user_idx, sat_idx] = calc_aods(
+                sat_radii=self.sat_spherical_coordinates[0][..., sat_idx],
+                user_radii=self.user_spherical_coordinates[0][..., user_idx[:, 0]],
+                distances=self.distances[..., user_idx, sat_idx],
+                center_aod_earth_rad=self.center_aod_earth_rad,
+                mirrored_users=self.get_mirrored(user_idx, sat_idx),
+            )
+
+    def calculate_steering_vectors(
+            self,
+    ) -> None:
+
+        changed_pairs = self._get_changed_pairs()
+
+        if changed_pairs is None and self.steering_vector_cache is not None:
+            self.steering_vector_cache.get(
+                aods=self.aods,
+                antenna_sat_idx=self.antenna_sat_idx,
+                out=self.steering_vectors,
+            )
+            return
+
+        if changed_pairs is None:
+            calc_steering_vectors(
+                aods=self.aods,
+                antenna_sat_idx=self.antenna_sat_idx,
+                antenna_steering_idx=self.antenna_steering_idx,
+                antenna_distance=self.antenna_distance,
+                wavelength=self.wavelength,
+                out=self.steering_vectors,
+                workspace=self._workspace_user_antenna,
+            )
+            return
+
+        for user_idx, sat_idx in changed_pairs:
+            antenna_columns, antenna_sat_positions = self._get_antenna_columns(sat_idx)
+            if self.steering_vector_cache is not None:
+                self.steering_vectors[..., user_idx, antenna_columns] = self.steering_vector_cache.get(
+                    aods=self.aods[..., user_idx, sat_idx],
+                    antenna_sat_idx=antenna_sat_positions,
+                    antenna_columns=antenna_columns,
+                )
+                continue
+            self.steering_vectors[..., user_idx, antenna_columns] = calc_steering_vectors(
+                aods=self.aods[..., user_idx, sat_idx],
+                antenna_sat_idx=antenna_sat_positions,
+                antenna_steering_idx=self.antenna_steering_idx[antenna_columns],
+                antenna_distance=self.antenna_distance,
+                wavelength=self.wavelength,
+            )
+
+    def calculate_channel_state(
+            self,
+            channel_model,
+    ) -> None:
+        """
+        Updates the channel state of all changed satellite/user pairs, then clears the change flags
+        """
+
+        changed_pairs = self._get_changed_pairs()
+
+        if changed_pairs is None:
+            channel_model(
+                distances=self.distances,
+                steering_vectors=self.steering_vectors,
+                antenna_sat_idx=self.antenna_sat_idx,
+                wavelength=self.wavelength,
+                antenna_gain_linear=self.antenna_gain_linear,
+                user_gain_linear=self.user_gain_linear,
+                out=self.channel_state,
+            )
+
+        else:
+            for user_idx, sat_idx in changed_pairs:
+                antenna_columns, antenna_sat_positions = self._get_antenna_columns(sat_idx)
+                self.channel_state[..., user_idx, antenna_columns] = channel_model(
+                    distances=self.distances[..., user_idx, sat_idx],
+                    steering_vectors=self.steering_vectors[..., user_idx, antenna_columns],
+                    antenna_sat_idx=antenna_sat_positions,
+                    wavelength=self.wavelength,
+                    antenna_gain_linear=self.antenna_gain_linear,
+                    user_gain_linear=self.user_gain_linear[user_idx[:, 0]],
+                )
+
+        self.sat_changed[:] = False
+        self.user_changed[:] = False
+
+    def calculate_erroneous_channel_state(
+            self,
+            error_model_config,
+            rng,
+    ) -> None:
+
+        error_model_config.error_model(
+            error_model_config=error_model_config,
+            constellation_state=self,
+            channel_state=self.channel_state,
+            rng=rng,
+            out=self.erroneous_channel_state,
+        )
+
+def calc_distances(
+        sat_cartesian_coordinates: ndarray,
+        user_cartesian_coordinates: ndarray,
+        out: ndarray = None,
+        workspace: ndarray = None,
+) -> ndarray:
+    """
+    Distances between all satellites (3 x ... x sat_nr) and all users (3 x ... x user_nr),
+    returns ... x user_nr x sat_nr
+    """
+
+    if out is None:
+        return euclidian_distance(
+            sat_cartesian_coordinates[..., newaxis, :],
+            user_cartesian_coordinates[..., :, newaxis],
+        )
+
+    # accumulate squared coordinate differences in place
+    for axis in range(3):
+        subtract(sat_cartesian_coordinates[axis][..., newaxis, :],
+                 user_cartesian_coordinates[axis][..., :, newaxis],
+                 out=workspace)
+        multiply(workspace, workspace, out=workspace)
+        if axis == 0:
+            out[...] = workspace
+        else:
+            add(out, workspace, out=out)
+    sqrt(out, out=out)
+
+    return out
+
+
+def calc_mirrored_users(
+        user_nr: int,
+) -> ndarray:
+    """
+    Flags the users right of the center by their position in the user list
+    """
+
+    user_pos_idx = arange(0, user_nr) - (user_nr - 1) / 2
+
+    return user_pos_idx >= 0
+
+
+def calc_aods(
+        sat_radii: ndarray,
+        user_radii: ndarray,
+        distances: ndarray,
+        center_aod_earth_rad: float,
+        mirrored_users: ndarray = None,
+        out: ndarray = None,
+        workspace: ndarray = None,
+) -> ndarray:
+    """
+    The calculation of the AODs is given by
+    AOD = asin(
+        ((orbit+radius_earth)^2 + sat_user_dist^2 - radius_earth^2)
+        /
+        (2 * (orbit+radius_earth) * sat_user_dist)
+    )
+    mirrored_users flags the pairs mirrored around the center aod, by default see calc_mirrored_users.
+    sat_radii: ... x sat_nr, user_radii: ... x user_nr, distances: ... x user_nr x sat_nr
+    """
+
+    if mirrored_users is None:
+        mirrored_users = calc_mirrored_users(distances.shape[-2])[:, newaxis]
+
+    if out is None:
+        aods = arcsin(
+            (
+                + sat_radii[..., newaxis, :] ** 2
+                + distances ** 2
+                - user_radii[..., :, newaxis] ** 2
+            )  # numerator
+            /
+            (
+                2 * sat_radii[..., newaxis, :] * distances
+            )  # denominator
+        )
+
+        return where(mirrored_users, 2 * center_aod_earth_rad - aods, aods)
+
+    # numerator
+    multiply(distances, distances, out=out)
+    add(sat_radii[..., newaxis, :] ** 2, out, out=out)
+    subtract(out, user_radii[..., :, newaxis] ** 2, out=out)
+
+    # denominator
+    multiply(2 * sat_radii[..., newaxis, :], distances, out=workspace)
+
+    divide(out, workspace, out=out)
+    arcsin(out, out=out)
+    subtract(2 * center_aod_earth_rad, out, out=out, where=mirrored_users)
+
+    return out
+
+
+def calc_steering_vectors(
+        aods: ndarray,
+        antenna_sat_idx: ndarray,
+        antenna_steering_idx: ndarray,
+        antenna_distance: float,
+        wavelength: float,
+        out: ndarray = None,
+        workspace: ndarray = None,
+) -> ndarray:
+    """
+    Steering vectors of ULAs for all AODs (... x user_nr x sat_nr), returns ... x user_nr x tot_antenna_nr,
+    antenna_sat_idx and antenna_steering_idx: satellite and ULA index of every antenna column.
+    wavelength may be subcarrier_nr x 1 x 1. With out, a real workspace of its shape is required.
+    """
+
+    if out is None:
+        steering_vectors = exp(
+            antenna_steering_idx * (
+                -1j * 2 * pi / wavelength
+                * antenna_distance
+                * cos(aods)
+            )[..., antenna_sat_idx]
+        )
+
+        return steering_vectors.astype('complex64')
+
+    if use_jit_kernels() and out.ndim == 2:
+        _calc_steering_vectors_kernel(
+            aods, antenna_sat_idx, antenna_steering_idx, -2 * pi / wavelength * antenna_distance, out)
+        return out
+
+    # exp(1j * phase) = cos(phase) + 1j * sin(phase)
+    multiply(
+        antenna_steering_idx,
+        (-2 * pi / wavelength * antenna_distance * cos(aods))[..., antenna_sat_idx],
+        out=workspace,
+    )
+    cos(workspace, out=out.real)
+    sin(workspace, out=out.imag)
+
+    return out
+
+
+@jit_kernel
+def _calc_steering_vectors_kernel(
+        aods: ndarray,
+        antenna_sat_idx: ndarray,
+        antenna_steering_idx: ndarray,
+        phase_factor: float,
+        out: ndarray,
+) -> None:
+
+    for user_idx in range(aods.shape[0]):
+        for antenna_idx in range(antenna_sat_idx.shape[0]):
+            phase = antenna_steering_idx[antenna_idx] * (phase_factor * cos(aods[user_idx, antenna_sat_idx[antenna_idx]]))
+            out[user_idx, antenna_idx] = cos(phase) + 1j * sin(phase)
@@ -0,0 +1,238 @@
+
+from numpy import (
+    ndarray,
+    zeros,
+    arange,
+    flatnonzero,
+    newaxis,
+    sqrt,
+    pi,
+    arcsin,
+    repeat,
+    concatenate,
+    unique,
+    nonzero,
+    ascontiguousarray,
+)
+from scipy.sparse import (
+    csr_matrix,
+)
+
+from src.data.constellation_state import (
+    ConstellationState,
+    calc_distances,
+    calc_aods,
+    calc_steering_vectors,
+)
+from src.data.spatial_index import (
+    SpatialIndex,
+    calc_max_slant_range,
+)
+
+
+class ConstellationVisibility:
+    """
+    Flags the satellite/user pairs of a ConstellationState that see each other at least at
+    min_elevation_deg, in constellation_state.visible, and computes the channel of visible pairs only.
+    Unbatched, candidate pairs come from a SpatialIndex range query instead of all pairs.
+    """
+
+    def __init__(
+            self,
+            constellation_state: ConstellationState,
+            min_elevation_deg: float = None,
+    ) -> None:
+
+        self.constellation_state: ConstellationState = constellation_state
+        self.min_elevation_rad: float = None if min_elevation_deg is None else min_elevation_deg * pi / 180
+
+        self.spatial_index: SpatialIndex = SpatialIndex()
+
+    def calculate_visibility(
+            self,
+    ) -> None:
+        """
+        Unbatched, only pairs within the maximum slant range are checked, batched requires current distances
+        """
+
+        constellation_state = self.constellation_state
+
+        if self.min_elevation_rad is None:
+            constellation_state.visible[...] = True
+            return
+
+        if constellation_state.batch_shape:
+            constellation_state.visible[...] = calc_elevations(
+                sat_cartesian_coordinates=constellation_state.sat_cartesian_coordinates,
+                user_cartesian_coordinates=constellation_state.user_cartesian_coordinates,
+                distances=constellation_state.distances,
+            ) >= self.min_elevation_rad
+            return
+
+        self.spatial_index.update(
+            sat_cartesian_coordinates=constellation_state.sat_cartesian_coordinates,
+            user_cartesian_coordinates=constellation_state.user_cartesian_coordinates,
+        )
+
+        # range of the highest satellite seen from the lowest user bounds all pairs
+        max_distance = calc_max_slant_range(
+            min_elevation_rad=self.min_elevation_rad,
+            sat_radius=constellation_state.sat_spherical_coordinates[0].max(),
+            user_radius=constellation_state.user_spherical_coordinates[0].min(),
+        )
+        candidate_user_idx, candidate_sat_idx, _ = self.spatial_index.pairs_in_range(max_distance=max_distance)
+
+        elevations = calc_elevations(
+            sat_cartesian_coordinates=constellation_state.sat_cartesian_coordinates[:, candidate_sat_idx, newaxis],
+            user_cartesian_coordinates=constellation_state.user_cartesian_coordinates[:, candidate_user_idx, newaxis],
+            distances=self._calc_pair_distances(candidate_user_idx, candidate_sat_idx)[:, newaxis, newaxis],
+        ).ravel()
+        visible_candidates = elevations >= self.min_elevation_rad
+
+        constellation_state.visible[...] = False
+        constellation_state.visible[candidate_user_idx[visible_candidates], candidate_sat_idx[visible_candidates]] = True
+
+    def _calc_pair_distances(
+            self,
+            user_idx: ndarray,
+            sat_idx: ndarray,
+    ) -> ndarray:
+        """
+        Distances of the pairs (user_idx[i], sat_idx[i]), unbatched
+        """
+
+        return calc_distances(
+            sat_cartesian_coordinates=self.constellation_state.sat_cartesian_coordinates[:, sat_idx, newaxis],
+            user_cartesian_coordinates=self.constellation_state.user_cartesian_coordinates[:, user_idx, newaxis],
+        ).ravel()
+
+    def calculate_sparse_channel_states(
+            self,
+            channel_model,
+            error_model_config,
+            rng,
+    ) -> tuple[csr_matrix, csr_matrix]:
+        """
+        Channel state and erroneous channel state of the visible pairs as sparse user_nr x tot_antenna_nr
+        matrices, one dense block per visible pair. Requires current visibility, unbatched only,
+        the dense buffers of the constellation state are not touched.
+        """
+
+        constellation_state = self.constellation_state
+
+        pair_user_idx, pair_sat_idx = nonzero(constellation_state.visible)
+        pair_antenna_nrs = constellation_state.antenna_nrs[pair_sat_idx]
+
+        pair_distances = self._calc_pair_distances(pair_user_idx, pair_sat_idx)
+        pair_aods = calc_aods(
+            sat_radii=constellation_state.sat_spherical_coordinates[0][pair_sat_idx, newaxis],
+            user_radii=constellation_state.user_spherical_coordinates[0][pair_user_idx, newaxis],
+            distances=pair_distances[:, newaxis, newaxis],
+            center_aod_earth_rad=constellation_state.center_aod_earth_rad,
+            mirrored_users=constellation_state.get_mirrored(pair_user_idx[:, newaxis, newaxis], pair_sat_idx[:, newaxis, newaxis]),
+        ).ravel()
+
+        rows, columns, values, erroneous_values = [], [], [], []
+
+        # pairs with the same antenna number form one pairs x antennas array, pairs take the user axis
+        for sat_antenna_nr in unique(pair_antenna_nrs):
+            block_pairs = flatnonzero(pair_antenna_nrs == sat_antenna_nr)
+            block_user_idx = pair_user_idx[block_pairs]
+            block_sat_idx = pair_sat_idx[block_pairs]
+
+            pair_blocks = _PairBlocks(
+                distances=pair_distances[block_pairs][:, newaxis],
+                antenna_nr=int(sat_antenna_nr),
+                antenna_distance=constellation_state.antenna_distance,
+                wavelength=constellation_state.wavelength,
+            )
+
+            steering_vectors = calc_steering_vectors(
+                aods=pair_aods[block_pairs][:, newaxis],
+                antenna_sat_idx=pair_blocks.antenna_sat_idx,
+                antenna_steering_idx=pair_blocks.antenna_steering_idx,
+                antenna_distance=constellation_state.antenna_distance,
+                wavelength=constellation_state.wavelength,
+            )
+
+            channel_state = channel_model(
+                distances=pair_blocks.distances,
+                steering_vectors=steering_vectors,
+                antenna_sat_idx=pair_blocks.antenna_sat_idx,
+                wavelength=constellation_state.wavelength,
+                antenna_gain_linear=constellation_state.antenna_gain_linear,
+                user_gain_linear=constellation_state.user_gain_linear[block_user_idx],
+            ).astype(constellation_state.complex_dtype, copy=False)
+
+            erroneous_channel_state = error_model_config.error_model(
+                error_model_config=error_model_config,
+                constellation_state=pair_blocks,
+                channel_state=channel_state,
+                rng=rng,
+            )
+
+            rows.append(repeat(block_user_idx, sat_antenna_nr))
+            columns.append(constellation_state.sat_antenna_columns[block_sat_idx, :sat_antenna_nr].ravel())
+            values.append(channel_state.ravel())
+            erroneous_values.append(erroneous_channel_state.ravel())
+
+        rows = concatenate(rows) if rows else zeros(0, dtype='int64')
+        columns = concatenate(columns) if columns else zeros(0, dtype='int64')
+        shape = (constellation_state.user_nr, constellation_state.tot_antenna_nr)
+        complex_dtype = constellation_state.complex_dtype
+
+        sparse_channel_state = csr_matrix(
+            (concatenate(values) if values else zeros(0, dtype=complex_dtype), (rows, columns)),
+            shape=shape,
+        )
+        sparse_erroneous_channel_state = csr_matrix(
+            (concatenate(erroneous_values) if erroneous_values else zeros(0, dtype=complex_dtype), (rows, columns)),
+            shape=shape,
+        )
+
+        return sparse_channel_state, sparse_erroneous_channel_state
+
+
+class _PairBlocks:
+    """
+    Satellite/user pairs of one antenna number presented in the ConstellationState layout,
+    pairs x 1 distances and one satellite of antenna_nr antennas, such that channel and error
+    models compute all pair blocks in one call
+    """
+
+    def __init__(
+            self,
+            distances: ndarray,
+            antenna_nr: int,
+            antenna_distance: float,
+            wavelength: float,
+    ) -> None:
+
+        self.distances: ndarray = ascontiguousarray(distances)
+        self.antenna_distance: float = antenna_distance
+        self.wavelength: float = wavelength
+        self.antenna_sat_idx: ndarray = zeros(antenna_nr, dtype='int64')
+        self.antenna_steering_idx: ndarray = arange(0, antenna_nr) - (antenna_nr - 1) / 2
+
+
+def calc_elevations(
+        sat_cartesian_coordinates: ndarray,
+        user_cartesian_coordinates: ndarray,
+        distances: ndarray,
+) -> ndarray:
+    """
+    Elevation of every satellite (3 x ... x sat_nr) over the horizon of every user (3 x ... x user_nr),
+    i.e., the angle between the user's tangent plane and the line of sight,
+    returns ... x user_nr x sat_nr in rad
+    """
+
+    user_radii = sqrt((user_cartesian_coordinates ** 2).sum(axis=0))
+
+    # projection of the line of sight on the user's local vertical
+    height_difference = (
+        (sat_cartesian_coordinates[:, ..., newaxis, :] * user_cartesian_coordinates[:, ..., :, newaxis]).sum(axis=0)
+        / user_radii[..., :, newaxis]
+        - user_radii[..., :, newaxis]
+    )
+
+    return arcsin(height_difference / distances)
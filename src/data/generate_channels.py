@@ -0,0 +1,73 @@
+
+from numpy import (
+    ndarray,
+)
+
+from src.data.constellation_state import (
+    ConstellationState,
+)
+from src.data.satellite_manager import (
+    calc_satellite_spherical_coordinates,
+)
+from src.data.user_manager import (
+    calc_user_spherical_coordinates,
+)
+from src.utils.rng_streams import (
+    RngStreams,
+)
+
+
+def generate_channels(
+        config,
+        n: int,
+        rng_streams: RngStreams = None,
+) -> tuple[ndarray, ndarray]:
+    """
+    Draws n independent Monte Carlo realizations of user and satellite positions and computes
+    the true and erroneous channel state information for all of them in one vectorized pass.
+    Equivalent to n calls of sim_update, without the per-realization Python overhead.
+    Positions are drawn from the 'environment' stream and errors from the 'error_model' stream of
+    rng_streams, by default config.rng_streams. Passing a child stream set, e.g., per sweep point,
+    makes the result independent of what was drawn before.
+
+    Returns:
+        channel_state_information: n x user_nr x sat_tot_ant_nr
+        erroneous_channel_state_information: n x user_nr x sat_tot_ant_nr
+    """
+
+    if rng_streams is None:
+        rng_streams = config.rng_streams
+    environment_rng = rng_streams.get('environment')
+
+    constellation_state = ConstellationState(
+        sat_nr=config.sat_nr,
+        user_nr=config.user_nr,
+        antenna_nr=config.sat_ant_nrs,
+        antenna_distance=config.sat_ant_dist,
+        antenna_gain_linear=config.sat_ant_gain_linear,
+        wavelength=config.wavelength,
+        center_aod_earth_deg=config.sat_center_aod_earth_deg,
+        steering_vector_cache_quantization=config.steering_vector_cache_quantization,
+        steering_vector_cache_interpolation=config.steering_vector_cache_interpolation,
+        precision=config.precision,
+        batch_size=n,
+    )
+
+    # same draw order as sim_update: users first, then satellites
+    constellation_state.update_user_positions(
+        spherical_coordinates=calc_user_spherical_coordinates(config=config, rng=environment_rng, batch_size=n),
+    )
+    constellation_state.update_satellite_positions(
+        spherical_coordinates=calc_satellite_spherical_coordinates(config=config, rng=environment_rng, batch_size=n),
+    )
+    constellation_state.user_gain_linear[:] = config.user_gain_linear
+    constellation_state.calculate_geometry()
+
+    constellation_state.calculate_channel_state(channel_model=config.channel_model)
+
+    constellation_state.calculate_erroneous_channel_state(
+        error_model_config=config.error_model,
+        rng=rng_streams.get('error_model'),
+    )
+
+    return constellation_state.channel_state, constellation_state.erroneous_channel_state
@@ -0,0 +1,85 @@
+
+from numpy import (
+    ndarray,
+    zeros,
+    newaxis,
+)
+
+from src.data.constellation_state import (
+    ConstellationState,
+    calc_steering_vectors,
+)
+
+
+class MulticarrierChannelState:
+    """
+    Channel state and erroneous channel state of a ConstellationState on all subcarriers,
+    subcarrier_nr x user_nr x tot_antenna_nr, unbatched only
+    """
+
+    def __init__(
+            self,
+            constellation_state: ConstellationState,
+            subcarrier_wavelengths: ndarray,
+    ) -> None:
+
+        self.constellation_state: ConstellationState = constellation_state
+        self.subcarrier_wavelengths: ndarray = subcarrier_wavelengths
+
+        # allocated on first use, the user number may change
+        self.steering_vectors: ndarray = None
+        self.channel_state: ndarray = None
+        self.erroneous_channel_state: ndarray = None
+        self._workspace_subcarrier_user_antenna: ndarray = None
+
+    def calculate_channel_states(
+            self,
+            channel_model,
+            error_model_config,
+            rng,
+    ) -> None:
+        """
+        One broadcast over subcarriers x users x antennas with every subcarrier's wavelength in the
+        steering and phase terms, requires current distances and AODs. The error of a satellite/user
+        pair is drawn once and applies to all subcarriers.
+        """
+
+        constellation_state = self.constellation_state
+
+        shape = (len(self.subcarrier_wavelengths), constellation_state.user_nr, constellation_state.tot_antenna_nr)
+        if self.channel_state is None or self.channel_state.shape != shape:
+            self.steering_vectors = zeros(shape, dtype='complex64')
+            self.channel_state = zeros(shape, dtype=constellation_state.complex_dtype)
+            self.erroneous_channel_state = zeros(shape, dtype=constellation_state.complex_dtype)
+            self._workspace_subcarrier_user_antenna = zeros(shape, dtype=constellation_state.real_dtype)
+
+        subcarrier_wavelengths = self.subcarrier_wavelengths[:, newaxis, newaxis]
+
+        calc_steering_vectors(
+            aods=constellation_state.aods,
+            antenna_sat_idx=constellation_state.antenna_sat_idx,
+            antenna_steering_idx=constellation_state.antenna_steering_idx,
+            antenna_distance=constellation_state.antenna_distance,
+            wavelength=subcarrier_wavelengths,
+            out=self.steering_vectors,
+            workspace=self._workspace_subcarrier_user_antenna,
+        )
+
+        channel_model(
+            distances=constellation_state.distances,
+            steering_vectors=self.steering_vectors,
+            antenna_sat_idx=constellation_state.antenna_sat_idx,
+            wavelength=subcarrier_wavelengths,
+            antenna_gain_linear=constellation_state.antenna_gain_linear,
+            user_gain_linear=constellation_state.user_gain_linear,
+            out=self.channel_state,
+        )
+
+        error_model_config.error_model(
+            error_model_config=error_model_config,
+            constellation_state=constellation_state,
+            channel_state=self.channel_state,
+            rng=rng,
+            out=self.erroneous_channel_state,
+            wavelength=subcarrier_wavelengths,
+        )
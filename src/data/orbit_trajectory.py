@@ -0,0 +1,90 @@
+
+from numpy import (
+    ndarray,
+)
+
+from src.utils.calc_orbit_trajectory import (
+    calc_orbit_trajectory,
+)
+from src.utils.spherical_to_cartesian_coordinates import (
+    spherical_to_cartesian_coordinates,
+)
+
+
+class OrbitTrajectory:
+    """
+    Cached satellite trajectory for the propagation mode, step_nr x 3 x sat_nr positions, or
+    step_nr x 3 x batch_size x sat_nr, such that a time step is a lookup. reset starts a new
+    trajectory, advance moves one step and extends the trajectory from its last position when
+    it runs out.
+    """
+
+    def __init__(
+            self,
+            config,
+    ) -> None:
+
+        self.time_step_s: float = config.orbit_time_step_s
+        self.step_nr: int = config.orbit_trajectory_steps
+        self.gravitational_parameter: float = config.earth_gravitational_parameter
+
+        self.trajectory_spherical_coordinates: ndarray = None
+        self.trajectory_cartesian_coordinates: ndarray = None
+        self.step: int = 0
+
+    # positions at the current step, 3 x (batch_size x) sat_nr
+
+    @property
+    def spherical_coordinates(
+            self,
+    ) -> ndarray:
+
+        return self.trajectory_spherical_coordinates[self.step]
+
+    @property
+    def cartesian_coordinates(
+            self,
+    ) -> ndarray:
+
+        return self.trajectory_cartesian_coordinates[self.step]
+
+    def reset(
+            self,
+            spherical_coordinates: ndarray,
+    ) -> None:
+        """
+        Caches the trajectory starting from spherical_coordinates and rewinds to its first step
+        """
+
+        self._calc_trajectory(spherical_coordinates=spherical_coordinates)
+
+    def advance(
+            self,
+    ) -> None:
+
+        self.step += 1
+        if self.step == len(self.trajectory_spherical_coordinates):
+            self._calc_trajectory(spherical_coordinates=self.trajectory_spherical_coordinates[-1], skip_first=True)
+
+    def _calc_trajectory(
+            self,
+            spherical_coordinates: ndarray,
+            skip_first: bool = False,
+    ) -> None:
+        """
+        Caches the trajectory starting from spherical_coordinates, optionally continuing
+        after them, and rewinds to its first step
+        """
+
+        trajectory = calc_orbit_trajectory(
+            spherical_coordinates=spherical_coordinates,
+            time_step_s=self.time_step_s,
+            step_nr=self.step_nr + skip_first,
+            gravitational_parameter=self.gravitational_parameter,
+        )
+        if skip_first:
+            trajectory = trajectory[1:]
+
+        self.trajectory_spherical_coordinates = trajectory
+        self.trajectory_cartesian_coordinates = spherical_to_cartesian_coordinates(trajectory.swapaxes(0, 1)).swapaxes(0, 1)
+        self.step = 0
@@ -1,6 +1,7 @@
 
 from numpy import (
     ndarray,
+    asarray,
     finfo,
     eye,
     matmul,
@@ -8,7 +9,15 @@ from numpy import (
     sqrt,
 )
 from numpy.linalg import (
-    inv,
+    solve,
+)
+from scipy.sparse import (
+    issparse,
+    identity,
+)
+from scipy.sparse.linalg import (
+    spsolve,
+    splu,
 )
 
 from src.utils.norm_precoder import (
@@ -22,7 +31,12 @@ def mmse_precoder_normalized(
         power_constraint_watt: float,
         sat_nr,
         sat_ant_nr,
+        antenna_sat_idx: ndarray = None,
 ) -> ndarray:
+    """
+    channel_matrix may be a stack n x user_nr x tot_ant_nr, e.g., all Monte Carlo realizations of a sweep point,
+    then n x tot_ant_nr x user_nr precoders are computed and normalized at once
+    """
 
     precoding_matrix = mmse_precoder_no_norm(
         channel_matrix=channel_matrix,
@@ -36,6 +50,7 @@ def mmse_precoder_normalized(
         per_satellite=True,
         sat_nr=sat_nr,
         sat_ant_nr=sat_ant_nr,
+        antenna_sat_idx=antenna_sat_idx,
     )
 
     return precoding_matrix_normed
@@ -45,22 +60,66 @@ def mmse_precoder_no_norm(
         channel_matrix,
         noise_power_watt: float,
         power_constraint_watt: float,
+        gram_space: str = None,
 ) -> ndarray:
+    """
+    (H^H H + a I)^-1 H^H, solved in antenna space, or in the equivalent user space form
+    H^H (H H^H + a I)^-1, which only needs a user_nr x user_nr system.
+    gram_space 'antenna' or 'user' forces a form, None picks the smaller system.
+    """
 
     # inversion_constant_lambda = finfo('float32').tiny
     inversion_constant_lambda = 0
 
-    user_nr = channel_matrix.shape[0]
-    sat_tot_ant_nr = channel_matrix.shape[1]
-
-    precoding_matrix = (
-        matmul(
-            inv(
-                matmul(channel_matrix.conj().T, channel_matrix)
-                + (noise_power_watt * user_nr / power_constraint_watt + inversion_constant_lambda) * eye(sat_tot_ant_nr)
-            ),
-            channel_matrix.conj().T
-        )
+    user_nr = channel_matrix.shape[-2]
+    sat_tot_ant_nr = channel_matrix.shape[-1]
+
+    regularization = noise_power_watt * user_nr / power_constraint_watt + inversion_constant_lambda
+
+    if gram_space is None:
+        gram_space = 'user' if user_nr < sat_tot_ant_nr else 'antenna'
+    if gram_space not in ('antenna', 'user'):
+        raise ValueError(f'Unknown gram space {gram_space}')
+
+    if issparse(channel_matrix):
+        # visibility pruned channel, solve the sparse regularized gram system instead of inverting it
+        channel_matrix_hermitian = channel_matrix.conj().T.tocsc()
+
+        if gram_space == 'user':
+            # the user space gram is small, solve it for the identity and apply the result to the sparse H^H
+            regularized_gram = (
+                channel_matrix @ channel_matrix_hermitian
+                + regularization * identity(user_nr, dtype=channel_matrix.dtype)
+            ).tocsc()
+            regularized_gram_inverse = splu(regularized_gram).solve(eye(user_nr, dtype=regularized_gram.dtype))
+
+            return asarray(channel_matrix_hermitian @ regularized_gram_inverse)
+
+        regularized_gram = (
+            channel_matrix_hermitian @ channel_matrix
+            + regularization * identity(sat_tot_ant_nr, dtype=channel_matrix.dtype)
+        ).tocsc()
+        precoding_matrix = spsolve(regularized_gram, channel_matrix_hermitian.toarray())
+
+        return precoding_matrix.reshape((sat_tot_ant_nr, user_nr))
+
+    # batched over leading dimensions, e.g., subcarriers or realizations,
+    #  solves the regularized gram system instead of inverting it
+    channel_matrix_hermitian = channel_matrix.conj().swapaxes(-1, -2)
+
+    if gram_space == 'user':
+        precoding_matrix = solve(
+            matmul(channel_matrix, channel_matrix_hermitian)
+            + regularization * eye(user_nr, dtype=channel_matrix.dtype),
+            channel_matrix,
+        ).conj().swapaxes(-1, -2)
+
+        return precoding_matrix
+
+    precoding_matrix = solve(
+        matmul(channel_matrix_hermitian, channel_matrix)
+        + regularization * eye(sat_tot_ant_nr, dtype=channel_matrix.dtype),
+        channel_matrix_hermitian,
     )
 
     return precoding_matrix
@@ -1,10 +1,12 @@
 
 from numpy import (
-    empty,
     sqrt,
+    asarray,
+    inf,
+    newaxis,
 )
-from numpy.linalg import (
-    norm,
+from scipy.sparse import (
+    issparse,
 )
 
 
@@ -12,18 +14,21 @@ def mrc_precoder_normalized(
         channel_matrix,
         power_constraint_watt: float,
 ):
-
-    user_nr = channel_matrix.shape[0]
-    sat_tot_ant_nr = channel_matrix.shape[1]
-
-    w_mrc = empty((sat_tot_ant_nr, user_nr), dtype='complex')
-
-    for user_id in range(user_nr):
-
-        H_k = channel_matrix[user_id, :]
-
-        w = (1 / norm(H_k)) * H_k.conj().T * sqrt(power_constraint_watt)
-
-        w_mrc[:, user_id] = w
+    """
+    channel_matrix user_nr x tot_ant_nr, or a stack n x user_nr x tot_ant_nr,
+    returns tot_ant_nr x user_nr, or n x tot_ant_nr x user_nr, precoders
+    """
+
+    if issparse(channel_matrix):
+        # visibility pruned channel, only the visible blocks of every user are matched
+        user_norms = sqrt(asarray(abs(channel_matrix).power(2).sum(axis=1)).ravel())
+        user_norms[user_norms == 0] = inf  # users without a visible satellite get a zero precoder
+        return channel_matrix.conj().T.multiply(sqrt(power_constraint_watt) / user_norms).toarray()
+
+    # batched over leading dimensions, e.g., realizations, all user norms in one reduction
+    user_norms = sqrt((channel_matrix.real ** 2 + channel_matrix.imag ** 2).sum(axis=-1))  # ... x user_nr
+
+    w_mrc = channel_matrix.conj().swapaxes(-1, -2)
+    w_mrc *= (sqrt(power_constraint_watt) / user_norms)[..., newaxis, :]  # in place, keeps the channel precision
 
     return w_mrc
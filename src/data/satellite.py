@@ -1,21 +1,14 @@
 
 from numpy import (
     ndarray,
-    array,
-    zeros,
-    arange,
-    pi,
-    exp,
-    cos,
-    arcsin,
 )
 
+from src.data.constellation_state import (
+    ConstellationState,
+)
 from src.utils.spherical_to_cartesian_coordinates import (
     spherical_to_cartesian_coordinates,
 )
-from src.utils.euclidian_distance import (
-    euclidian_distance,
-)
 from src.utils.get_wavelength import (
     get_wavelength,
 )
@@ -27,7 +20,7 @@ class Satellite:
             self,
             rng,
             idx,
-            spherical_coordinates: ndarray,
+            constellation_state: ConstellationState,
             antenna_nr: int,
             antenna_distance: float,
             antenna_gain_linear: float,
@@ -38,8 +31,10 @@ class Satellite:
         self.rng = rng
 
         self.idx: int = idx
-        self.spherical_coordinates: ndarray = spherical_coordinates
-        self.cartesian_coordinates: ndarray = spherical_to_cartesian_coordinates(spherical_coordinates)
+
+        # views into the constellation state, updated in place by the satellite manager
+        self.spherical_coordinates: ndarray = constellation_state.sat_spherical_coordinates[:, idx]
+        self.cartesian_coordinates: ndarray = constellation_state.sat_cartesian_coordinates[:, idx]
 
         self.antenna_nr: int = antenna_nr
         self.antenna_distance: float = antenna_distance  # antenna distance in meters
@@ -50,113 +45,55 @@ class Satellite:
 
         self.center_aod_earth_deg: float = center_aod_earth_deg
 
-        self.distance_to_users = None  # user_idx[int]: dist[float]
-        self.aods_to_users = None  # user_idx[int]: aod[float] in rad
-        self.steering_vectors_to_users = None  # user_idx[int]: steering_vector[ndarray] \in 1 x antenna_nr
+        # this satellite's antenna columns in the flat antenna layout, not contiguous, so the
+        #  steering vector and channel state properties are copies
+        self._antenna_columns: ndarray = constellation_state.sat_antenna_columns[idx, :antenna_nr]
+        self._constellation_state: ConstellationState = constellation_state
 
-        self.channel_state_to_users: ndarray = array([])  # depends on channel model
-        self.erroneous_channel_state_to_users: ndarray = array([])  # depends on channel & error model
+        self._sat_changed: ndarray = constellation_state.sat_changed
 
-    def update_position(
+    # views into the constellation state, taken on access as the user number may change
+
+    @property
+    def distance_to_users(
             self,
-            spherical_coordinates,
-    ):
+    ) -> ndarray:
 
-        self.spherical_coordinates = spherical_coordinates
-        self.cartesian_coordinates = spherical_to_cartesian_coordinates(spherical_coordinates)
+        return self._constellation_state.distances[:, self.idx]  # user_idx[int]: dist[float]
 
-    def calculate_distance_to_users(
+    @property
+    def aods_to_users(
             self,
-            users: list,
-    ) -> None:
-        # TODO: This doesn't change values of users that might have disappeared
+    ) -> ndarray:
 
-        if self.distance_to_users is None:
-            self.distance_to_users = zeros(len(users))
+        return self._constellation_state.aods[:, self.idx]  # user_idx[int]: aod[float] in rad
 
-        for user in users:
-            self.distance_to_users[user.idx] = euclidian_distance(self.cartesian_coordinates,
-                                                                  user.cartesian_coordinates)
-
-    def calculate_aods_to_users(
-            self,
-            users: list
-    ) -> None:
-        """
-        The calculation of the AODs is given by
-        AOD = asin(
-            ((orbit+radius_earth)^2 + sat_user_dist^2 - radius_earth^2)
-            /
-            (2 * (orbit+radius_earth) * sat_user_dist)
-        )
-        """
-        # TODO: This doesn't change values of users that might have disappeared
-
-        if self.aods_to_users is None:
-            self.aods_to_users = zeros(len(users))
-
-        user_pos_idx = arange(0, len(users)) - (len(users) - 1) / 2
-
-        for user in users:
-
-            self.aods_to_users[user.idx] = arcsin(
-                (
-                        + self.spherical_coordinates[0] ** 2
-                        + self.distance_to_users[user.idx] ** 2
-                        - user.spherical_coordinates[0] ** 2
-                )  # numerator
-                /
-                (
-                        2 * self.spherical_coordinates[0] * self.distance_to_users[user.idx]
-                )  # denominator
-            )
-
-            if user_pos_idx[user.idx] >= 0:
-                self.aods_to_users[user.idx] = 2 * (self.center_aod_earth_deg * pi/180) - self.aods_to_users[user.idx]
-
-    def calculate_steering_vectors(
+    @property
+    def steering_vectors_to_users(
             self,
-            users: list,
-    ) -> None:
-        """
-        This function provides the steering vectors for a given ULA and AOD
-        """
+    ) -> ndarray:
 
-        if self.steering_vectors_to_users is None:
-            self.steering_vectors_to_users = zeros((len(users), self.antenna_nr), dtype='complex64')
+        return self._constellation_state.steering_vectors[:, self._antenna_columns]  # user_idx[int]: steering_vector[ndarray] \in 1 x antenna_nr
 
-        steering_idx = arange(0, self.antenna_nr) - (self.antenna_nr - 1) / 2
+    @property
+    def channel_state_to_users(
+            self,
+    ) -> ndarray:
 
-        for user in users:
-            self.steering_vectors_to_users[user.idx, :] = exp(
-                steering_idx * (
-                    -1j * 2 * pi / self.wavelength
-                    * self.antenna_distance
-                    * cos(self.aods_to_users[user.idx])
-                )
-            )
+        return self._constellation_state.channel_state[:, self._antenna_columns]  # depends on channel model
 
-    def update_channel_state_information(
+    @property
+    def erroneous_channel_state_to_users(
             self,
-            channel_model,
-            users: list,
-    ) -> None:
-        """
-        This function updates the channel state to given users
-        according to a given channel model
-        """
-        self.channel_state_to_users = channel_model(self, users)
+    ) -> ndarray:
+
+        return self._constellation_state.erroneous_channel_state[:, self._antenna_columns]  # depends on channel & error model
 
-    def update_erroneous_channel_state_information(
+    def update_position(
             self,
-            error_model_config,
-            users: list,
-    ) -> None:
-        """
-        This function updates erroneous channel state information to users
-        according to a given user list and error model config
-        """
-
-        self.erroneous_channel_state_to_users = error_model_config.error_model(error_model_config=error_model_config,
-                                                                               satellite=self,
-                                                                               users=users)
+            spherical_coordinates,
+    ):
+
+        self._sat_changed[self.idx] = True
+        self.spherical_coordinates[:] = spherical_coordinates
+        spherical_to_cartesian_coordinates(self.spherical_coordinates, out=self.cartesian_coordinates)
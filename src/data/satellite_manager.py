@@ -1,21 +1,35 @@
 
 from numpy import (
     ndarray,
-    array,
-    reshape,
     arange,
-    zeros,
+    stack,
     ones,
+    sign,
     arccos,
     pi,
 )
+from scipy.sparse import (
+    csr_matrix,
+)
 
 from src.config.config import (
     Config,
 )
+from src.data.constellation_state import (
+    ConstellationState,
+)
+from src.data.constellation_visibility import (
+    ConstellationVisibility,
+)
+from src.data.multicarrier_channel_state import (
+    MulticarrierChannelState,
+)
 from src.data.satellite import (
     Satellite,
 )
+from src.data.orbit_trajectory import (
+    OrbitTrajectory,
+)
 
 
 class SatelliteManager:
@@ -29,56 +43,91 @@ class SatelliteManager:
     ) -> None:
 
         self.rng = config.rng
+        self.error_rng = config.rng_streams.get_pooled('error_model')
         self.logger = config.logger.getChild(__name__)
 
+        if config.sat_position_mode not in ('random', 'propagate'):
+            raise ValueError(f'Unknown satellite position mode {config.sat_position_mode}')
+        self.position_mode: str = config.sat_position_mode
+
+        # propagation mode, cached positions step_nr x 3 x sat_nr, a step is a lookup
+        self.trajectory: OrbitTrajectory = OrbitTrajectory(config=config)
+
+        self.constellation_state = ConstellationState(
+            sat_nr=config.sat_nr,
+            user_nr=config.user_nr,
+            antenna_nr=config.sat_ant_nrs,
+            antenna_distance=config.sat_ant_dist,
+            antenna_gain_linear=config.sat_ant_gain_linear,
+            wavelength=config.wavelength,
+            center_aod_earth_deg=config.sat_center_aod_earth_deg,
+            steering_vector_cache_quantization=config.steering_vector_cache_quantization,
+            steering_vector_cache_interpolation=config.steering_vector_cache_interpolation,
+            precision=config.precision,
+            relative_aod_side=config.sat_position_mode == 'propagate',
+        )
+        self.visibility: ConstellationVisibility = ConstellationVisibility(
+            constellation_state=self.constellation_state,
+            min_elevation_deg=config.sat_min_elevation_deg,
+        )
+        self.multicarrier_channel_state: MulticarrierChannelState = MulticarrierChannelState(
+            constellation_state=self.constellation_state,
+            subcarrier_wavelengths=config.subcarrier_wavelengths,
+        )
+
         self.satellites: list[Satellite] = []
         self._initialize_satellites(config=config)
 
-        self.channel_state_information: ndarray = array([])  # ndarray \in dim_user x (nr_antennas * nr_satellites)
-                                                             #  per user: sat 1 ant1, sat 1 ant 2, sat 1 ant 3, sat 2 ant 1, ...
-        self.erroneous_channel_state_information: ndarray = array([])  # ndarray \in dim_user x (nr_antennas * nr_satellites)
+        self.antenna_sat_idx: ndarray = self.constellation_state.antenna_sat_idx  # satellite of every antenna column
+
+        # visibility pruned global channel state information, sparse dim_user x tot_nr_antennas,
+        #  only blocks of satellite/user pairs above the minimum elevation are stored
+        self.sparse_channel_state_information: csr_matrix = None
+        self.sparse_erroneous_channel_state_information: csr_matrix = None
 
         self.logger.info('satellites setup complete')
 
-    def calc_spherical_coordinates(
+    # global channel state information of the constellation state, ndarray \in dim_user x tot_nr_antennas
+    #  per user: ant 1 sat 1, ant 1 sat 2, ..., ant 2 sat 1, ..., satellites may differ in antenna nr,
+    #  taken on access as the user number may change
+
+    @property
+    def channel_state_information(
             self,
-            config,
     ) -> ndarray:
 
-        # calculate average satellite positions
-        sat_pos_average = (arange(0, config.sat_nr) - (config.sat_nr - 1) / 2) * config.sat_dist_average
-
-        # add random value on satellite distances
-        random_factor = self.rng.uniform(low=-config.sat_dist_bound,
-                                         high=config.sat_dist_bound,
-                                         size=config.sat_nr)
-        sat_dist = sat_pos_average + random_factor
+        return self.constellation_state.channel_state
 
-        # calculate sat_aods_diff_earth_rad
-        sat_aods_diff_earth_rad = zeros(config.sat_nr)
+    @property
+    def erroneous_channel_state_information(
+            self,
+    ) -> ndarray:
 
-        for sat_idx in range(config.sat_nr):
+        return self.constellation_state.erroneous_channel_state
 
-            if sat_dist[sat_idx] < 0:
-                sat_aods_diff_earth_rad[sat_idx] = -1 * arccos(1 - 0.5 * (sat_dist[sat_idx] / config.radius_orbit)**2)
-            elif sat_dist[sat_idx] >= 0:
-                sat_aods_diff_earth_rad[sat_idx] = arccos(1 - 0.5 * (sat_dist[sat_idx] / config.radius_orbit)**2)
+    # multicarrier channel state information, ndarray \in dim_subcarrier x dim_user x tot_nr_antennas
 
-        # calculate sat_center_aod_earth_rad
-        sat_center_aod_earth_rad = config.sat_center_aod_earth_deg * pi / 180
+    @property
+    def multicarrier_channel_state_information(
+            self,
+    ) -> ndarray:
 
-        # TODO: if any(sat_pos_average == 0) == 1, vllt Fallunterscheidung für gerade und ungerade
+        return self.multicarrier_channel_state.channel_state
 
-        # calculate sat_aods_earth_rad
-        sat_aods_earth_rad = sat_center_aod_earth_rad + sat_aods_diff_earth_rad
+    @property
+    def multicarrier_erroneous_channel_state_information(
+            self,
+    ) -> ndarray:
 
-        # create satellite objects
-        sat_radii = config.radius_orbit * ones(config.sat_nr)
-        sat_inclinations = pi / 2 * ones(config.sat_nr)
+        return self.multicarrier_channel_state.erroneous_channel_state
 
-        sat_spherical_coordinates = array([sat_radii, sat_inclinations, sat_aods_earth_rad])
+    def calc_spherical_coordinates(
+            self,
+            config,
+            batch_size: int = None,
+    ) -> ndarray:
 
-        return sat_spherical_coordinates
+        return calc_satellite_spherical_coordinates(config=config, rng=self.rng, batch_size=batch_size)
 
     def _initialize_satellites(
             self,
@@ -88,13 +137,19 @@ class SatelliteManager:
         Initializes satellite object list for given configuration
         """
 
-        sat_spherical_coordinates = self.calc_spherical_coordinates(config=config)
+        if self.position_mode == 'propagate':
+            self.reset_trajectory(config=config)
+        else:
+            self.constellation_state.update_satellite_positions(
+                spherical_coordinates=self.calc_spherical_coordinates(config=config),
+            )
 
         for sat_idx in range(config.sat_nr):
             self.satellites.append(
                 Satellite(
                     idx=sat_idx,
-                    spherical_coordinates=sat_spherical_coordinates[:, sat_idx],
+                    constellation_state=self.constellation_state,
+                    antenna_nr=config.sat_ant_nrs[sat_idx],
                     **config.satellite_args,
                 )
             )
@@ -103,13 +158,38 @@ class SatelliteManager:
             self,
             config,
     ) -> None:
+        """
+        Draws new satellite positions, or, in propagation mode, advances the satellites
+        by one time step along the cached trajectory
+        """
 
-        sat_spherical_coordinates = self.calc_spherical_coordinates(config=config)
-
-        for satellite in self.satellites:
-            satellite.update_position(
-                spherical_coordinates=sat_spherical_coordinates[:, satellite.idx],
+        if self.position_mode == 'propagate':
+            self.trajectory.advance()
+            self.constellation_state.update_satellite_positions(
+                spherical_coordinates=self.trajectory.spherical_coordinates,
+                cartesian_coordinates=self.trajectory.cartesian_coordinates,
             )
+            return
+
+        self.constellation_state.update_satellite_positions(
+            spherical_coordinates=self.calc_spherical_coordinates(config=config),
+        )
+
+    def reset_trajectory(
+            self,
+            config,
+    ) -> None:
+        """
+        Draws new initial satellite positions and precomputes their trajectory for
+        config.orbit_trajectory_steps steps, e.g., at the start of an episode
+        """
+
+        self.trajectory.reset(spherical_coordinates=self.calc_spherical_coordinates(config=config))
+
+        self.constellation_state.update_satellite_positions(
+            spherical_coordinates=self.trajectory.spherical_coordinates,
+            cartesian_coordinates=self.trajectory.cartesian_coordinates,
+        )
 
     def calculate_satellite_distances_to_users(
             self,
@@ -119,32 +199,29 @@ class SatelliteManager:
         This function calculates the distances between each satellite and user
         """
 
-        for satellite in self.satellites:
-            satellite.calculate_distance_to_users(users=users)
+        self.constellation_state.update_users(users=users)
+        self.constellation_state.calculate_distances()
 
     def calculate_satellite_aods_to_users(
             self,
-            users: list,
     ) -> None:
         """
         This function calculates the AODs (angles of departure) from each satellite to
-        each user (Earth and satellite orbits are assumed to be circular)
+        each user (Earth and satellite orbits are assumed to be circular), for the users of the
+        last calculate_satellite_distances_to_users
         """
 
-        for satellite in self.satellites:
-            satellite.calculate_aods_to_users(users=users)
+        self.constellation_state.calculate_aods()
 
     def calculate_steering_vectors_to_users(
             self,
-            users: list,
     ) -> None:
         """
         This function calculates the steering vectors (one value per antenna) for each satellite to
-        each user
+        each user, for the users of the last calculate_satellite_distances_to_users
         """
 
-        for satellite in self.satellites:
-            satellite.calculate_steering_vectors(users=users)
+        self.constellation_state.calculate_steering_vectors()
 
     def update_channel_state_information(
             self,
@@ -152,54 +229,148 @@ class SatelliteManager:
             users: list,
     ) -> None:
         """
-        This function builds channel state information between each satellite antenna and user, then
-        accumulates all into a global channel state information matrix
+        This function builds channel state information between each satellite antenna and user
+        in one pass over all satellites, users and antennas. The global channel state information
+        matrix and the per satellite channel states are views into the result.
         """
 
-        # TODO: This will break when satellites dont have the same nr of antennas
-        # TODO: This will also produce weird results when users or sats are not numbered consecutively
+        self.constellation_state.calculate_channel_state(channel_model=channel_model)
 
-        # update channel state per satellite
-        for satellite in self.satellites:
-            satellite.update_channel_state_information(channel_model=channel_model, users=users)
+    def update_erroneous_channel_state_information(
+            self,
+            error_model_config,
+            users: list,
+    ) -> None:
 
-        # build global channel state information
-        channel_state_per_satellite = zeros((len(users), self.satellites[0].antenna_nr, len(self.satellites)),
-                                            dtype='complex')
-        for satellite in self.satellites:
-            channel_state_per_satellite[:, :, satellite.idx] = satellite.channel_state_to_users
-        self.channel_state_information = reshape(
-            channel_state_per_satellite, (len(users), self.satellites[0].antenna_nr * len(self.satellites)))
+        """
+        This function applies the configured error model to the channel state of all satellites
+        and users at once
+        """
 
-    def update_erroneous_channel_state_information(
+        self.constellation_state.calculate_erroneous_channel_state(
+            error_model_config=error_model_config,
+            rng=self.error_rng,
+        )
+
+    def update_multicarrier_channel_state_information(
             self,
+            channel_model,
             error_model_config,
             users: list,
     ) -> None:
+        """
+        This function builds the channel state information and the erroneous channel state information
+        on every subcarrier at once, requires current distances and AODs
+        """
+
+        self.multicarrier_channel_state.calculate_channel_states(
+            channel_model=channel_model,
+            error_model_config=error_model_config,
+            rng=self.error_rng,
+        )
+
+    def update_visibility(
+            self,
+            users: list,
+    ) -> None:
+        """
+        This function flags the satellite/user pairs with line of sight above the minimum elevation,
+        candidate pairs are found with a spatial index
+        """
 
-        # TODO: This will break when satellites dont have the same nr of antennas
-        # TODO: This will also produce weird results when users or sats are not numbered consecutively
+        self.constellation_state.update_users(users=users)
+        self.visibility.calculate_visibility()
+
+    def get_sats_in_range_of_user(
+            self,
+            user,
+            max_distance: float,
+    ) -> ndarray:
+        """
+        This function returns the indices of the satellites within max_distance of a user,
+        requires a current spatial index, e.g., from update_visibility
+        """
 
-        # apply error model per satellite
-        for satellite in self.satellites:
-            satellite.update_erroneous_channel_state_information(error_model_config=error_model_config, users=users)
+        return self.visibility.spatial_index.sats_in_range(
+            position=user.cartesian_coordinates, max_distance=max_distance)
 
-        # gather global erroneous channel state information
-        erroneous_channel_state_per_satellite = zeros(
-            (len(users), self.satellites[0].antenna_nr, len(self.satellites)),
-            dtype='complex',
+    def get_users_in_footprint(
+            self,
+            footprint_center_cartesian_coordinates: ndarray,
+            footprint_radius: float,
+    ) -> ndarray:
+        """
+        This function returns the indices of the users within a beam footprint,
+        requires a current spatial index, e.g., from update_visibility
+        """
+
+        return self.visibility.spatial_index.users_in_range(
+            position=footprint_center_cartesian_coordinates, max_distance=footprint_radius)
+
+    def update_sparse_channel_state_information(
+            self,
+            channel_model,
+            error_model_config,
+            users: list,
+    ) -> None:
+        """
+        This function builds the channel state information and the erroneous channel state information
+        of visible satellite/user pairs only, in sparse block format. Invisible pairs are not computed
+        and stay zero. Neither all pairwise distances nor AODs are required.
+        """
+
+        self.update_visibility(users=users)
+
+        (
+            self.sparse_channel_state_information,
+            self.sparse_erroneous_channel_state_information,
+        ) = self.visibility.calculate_sparse_channel_states(
+            channel_model=channel_model,
+            error_model_config=error_model_config,
+            rng=self.error_rng,
         )
-        for satellite in self.satellites:
-            erroneous_channel_state_per_satellite[:, :, satellite.idx] = satellite.erroneous_channel_state_to_users
-        self.erroneous_channel_state_information = reshape(
-            erroneous_channel_state_per_satellite, (len(users), self.satellites[0].antenna_nr * len(self.satellites)))
 
     def get_aods_to_users(
             self,
     ) -> ndarray:
 
-        aods_to_users = zeros((len(self.satellites), len(self.satellites[0].aods_to_users)))
-        for satellite_id, satellite in enumerate(self.satellites):
-            aods_to_users[satellite_id, :] = array(list(satellite.aods_to_users.values()))
+        return self.constellation_state.aods.T.copy()
+
+
+def calc_satellite_spherical_coordinates(
+        config,
+        rng,
+        batch_size: int = None,
+) -> ndarray:
+    """
+    Draws satellite positions, returns spherical coordinates 3 x sat_nr,
+    or 3 x batch_size x sat_nr if a batch_size is given
+    """
+
+    # calculate average satellite positions
+    sat_pos_average = (arange(0, config.sat_nr) - (config.sat_nr - 1) / 2) * config.sat_dist_average
+
+    # add random value on satellite distances
+    random_factor = rng.uniform(low=-config.sat_dist_bound,
+                                high=config.sat_dist_bound,
+                                size=config.sat_nr if batch_size is None else (batch_size, config.sat_nr))
+    sat_dist = sat_pos_average + random_factor
+
+    # calculate sat_aods_diff_earth_rad
+    sat_aods_diff_earth_rad = sign(sat_dist) * arccos(1 - 0.5 * (sat_dist / config.radius_orbit)**2)
+
+    # calculate sat_center_aod_earth_rad
+    sat_center_aod_earth_rad = config.sat_center_aod_earth_deg * pi / 180
+
+    # TODO: if any(sat_pos_average == 0) == 1, vllt Fallunterscheidung für gerade und ungerade
+
+    # calculate sat_aods_earth_rad
+    sat_aods_earth_rad = sat_center_aod_earth_rad + sat_aods_diff_earth_rad
+
+    # create satellite objects
+    sat_radii = config.radius_orbit * ones(sat_dist.shape)
+    sat_inclinations = pi / 2 * ones(sat_dist.shape)
+
+    sat_spherical_coordinates = stack([sat_radii, sat_inclinations, sat_aods_earth_rad])
 
-        return aods_to_users
+    return sat_spherical_coordinates
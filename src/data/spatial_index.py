@@ -0,0 +1,105 @@
+
+from numpy import (
+    ndarray,
+    array,
+    array_equal,
+    zeros,
+    sqrt,
+    sin,
+    lexsort,
+)
+from scipy.spatial import (
+    cKDTree,
+)
+
+
+class SpatialIndex:
+    """
+    KD-trees over satellite and user cartesian positions (3 x sat_nr, 3 x user_nr) for range queries,
+    e.g., which satellites can serve a user, which users fall into a beam footprint, or all
+    satellite/user pairs within a distance, without computing all pairwise distances.
+    Each tree is only rebuilt if its positions changed since the last update.
+    """
+
+    def __init__(
+            self,
+            leaf_size: int = 16,
+    ) -> None:
+
+        self.leaf_size: int = leaf_size
+
+        self.sat_tree: cKDTree = None
+        self.user_tree: cKDTree = None
+        self._sat_positions: ndarray = None
+        self._user_positions: ndarray = None
+
+        self.rebuilds: int = 0
+
+    def update(
+            self,
+            sat_cartesian_coordinates: ndarray,
+            user_cartesian_coordinates: ndarray,
+    ) -> None:
+
+        if self._sat_positions is None or not array_equal(self._sat_positions, sat_cartesian_coordinates):
+            self._sat_positions = sat_cartesian_coordinates.copy()
+            self.sat_tree = cKDTree(self._sat_positions.T, leafsize=self.leaf_size)
+            self.rebuilds += 1
+
+        if self._user_positions is None or not array_equal(self._user_positions, user_cartesian_coordinates):
+            self._user_positions = user_cartesian_coordinates.copy()
+            self.user_tree = cKDTree(self._user_positions.T, leafsize=self.leaf_size)
+            self.rebuilds += 1
+
+    def sats_in_range(
+            self,
+            position: ndarray,
+            max_distance: float,
+    ) -> ndarray:
+        """
+        Indices of satellites within max_distance of a cartesian position, e.g., a user's, sorted
+        """
+
+        return array(sorted(self.sat_tree.query_ball_point(position, r=max_distance)), dtype='int64')
+
+    def users_in_range(
+            self,
+            position: ndarray,
+            max_distance: float,
+    ) -> ndarray:
+        """
+        Indices of users within max_distance of a cartesian position, e.g., a beam footprint center, sorted
+        """
+
+        return array(sorted(self.user_tree.query_ball_point(position, r=max_distance)), dtype='int64')
+
+    def pairs_in_range(
+            self,
+            max_distance: float,
+    ) -> tuple[ndarray, ndarray, ndarray]:
+        """
+        All satellite/user pairs within max_distance, returns user indices, satellite indices
+        and distances, ordered by user, then satellite
+        """
+
+        pairs = self.user_tree.sparse_distance_matrix(self.sat_tree, max_distance=max_distance, output_type='ndarray')
+        if len(pairs) == 0:
+            return zeros(0, dtype='int64'), zeros(0, dtype='int64'), zeros(0)
+
+        order = lexsort((pairs['j'], pairs['i']))
+
+        return pairs['i'][order].astype('int64'), pairs['j'][order].astype('int64'), pairs['v'][order]
+
+
+def calc_max_slant_range(
+        min_elevation_rad: float,
+        sat_radius,
+        user_radius,
+):
+    """
+    Largest distance at which a satellite at sat_radius is seen from a user at user_radius
+    at an elevation of at least min_elevation_rad, from
+        sat_radius^2 = user_radius^2 + d^2 + 2 * user_radius * d * sin(elevation)
+    """
+
+    return sqrt(user_radius ** 2 * sin(min_elevation_rad) ** 2 + sat_radius ** 2 - user_radius ** 2) - user_radius * sin(min_elevation_rad)
@@ -0,0 +1,87 @@
+
+from numpy import (
+    ndarray,
+    arange,
+    unique,
+    ceil,
+    floor,
+    rint,
+    cos,
+    exp,
+    pi,
+    newaxis,
+)
+
+
+class SteeringVectorCache:
+    """
+    Lookup table of ULA steering vectors over cos(aod) in [-1, 1], quantized to multiples of
+    quantization, one column per distinct ULA index. With interpolation, vectors are interpolated
+    linearly between the two neighboring entries.
+    """
+
+    def __init__(
+            self,
+            antenna_steering_idx: ndarray,
+            antenna_distance: float,
+            wavelength: float,
+            quantization: float,
+            interpolation: bool = False,
+            dtype: str = 'complex128',
+    ) -> None:
+
+        self.quantization: float = quantization
+        self.interpolation: bool = interpolation
+
+        # table column of every antenna column
+        steering_idx_values, self._antenna_table_columns = unique(antenna_steering_idx, return_inverse=True)
+
+        # keys -key_nr..key_nr cover cos(aod) in [-1, 1], one more for the upper interpolation neighbor
+        self._key_offset: int = int(ceil(1 / quantization))
+        cos_aods = arange(-self._key_offset, self._key_offset + 2) * quantization
+        self.table: ndarray = exp(
+            -1j * 2 * pi / wavelength * antenna_distance * cos_aods[:, newaxis] * steering_idx_values
+        ).astype(dtype)  # key x distinct ULA index
+
+    def get(
+            self,
+            aods: ndarray,
+            antenna_sat_idx: ndarray,
+            antenna_columns: ndarray = None,
+            out: ndarray = None,
+    ) -> ndarray:
+        """
+        Steering vectors for AODs ... x sat_nr, returns ... x antenna_column_nr,
+        antenna_columns defaults to all
+        """
+
+        table_columns = self._antenna_table_columns
+        if antenna_columns is not None:
+            table_columns = table_columns[antenna_columns]
+
+        # flat table index key * table_column_nr + table_column
+        quantized_cos_aods = cos(aods) / self.quantization
+
+        if not self.interpolation:
+            keys = rint(quantized_cos_aods).astype('int64')[..., antenna_sat_idx]
+            keys += self._key_offset
+            keys *= self.table.shape[1]
+            keys += table_columns
+            steering_vectors = self.table.take(keys)
+
+        else:
+            lower_keys = floor(quantized_cos_aods)
+            weight_upper = (quantized_cos_aods - lower_keys)[..., antenna_sat_idx]
+            lower_keys = lower_keys.astype('int64')[..., antenna_sat_idx]
+            lower_keys += self._key_offset
+            lower_keys *= self.table.shape[1]
+            lower_keys += table_columns
+            steering_vectors_lower = self.table.take(lower_keys)
+            steering_vectors_upper = self.table.take(lower_keys + self.table.shape[1])
+            steering_vectors = steering_vectors_lower + weight_upper * (steering_vectors_upper - steering_vectors_lower)
+
+        if out is None:
+            return steering_vectors
+
+        out[...] = steering_vectors
+        return out
@@ -10,12 +10,17 @@ class User:
             self,
             idx,
             spherical_coordinates,
+            cartesian_coordinates,
             gain_linear,
+            user_id: int = None,
     ) -> None:
 
-        self.idx: int = idx
+        self.idx: int = idx  # current slot in the user manager, may change when other users leave
+        self.id: int = idx if user_id is None else user_id  # stable
+
+        # views into the user manager position arrays, updated in place
         self.spherical_coordinates = spherical_coordinates
-        self.cartesian_coordinates = spherical_to_cartesian_coordinates(spherical_coordinates)
+        self.cartesian_coordinates = cartesian_coordinates
 
         self.gain_linear: float = gain_linear
 
@@ -24,5 +29,5 @@ class User:
             spherical_coordinates,
     ) -> None:
 
-        self.spherical_coordinates = spherical_coordinates
-        self.cartesian_coordinates = spherical_to_cartesian_coordinates(spherical_coordinates)
+        self.spherical_coordinates[:] = spherical_coordinates
+        spherical_to_cartesian_coordinates(self.spherical_coordinates, out=self.cartesian_coordinates)
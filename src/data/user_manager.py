@@ -1,12 +1,13 @@
 
 from numpy import (
     ndarray,
-    array,
     arange,
-    zeros,
+    stack,
     ones,
+    sign,
     arccos,
     pi,
+    zeros,
 )
 
 from src.config.config import (
@@ -15,11 +16,18 @@ from src.config.config import (
 from src.data.user import (
     User,
 )
+from src.utils.spherical_to_cartesian_coordinates import (
+    spherical_to_cartesian_coordinates,
+)
 
 
 class UserManager:
     """
-    Users holds all user objects
+    Users holds all user objects.
+    Users may join (add_user) and leave (remove_user) at runtime. Every user has a stable id,
+    user_slots maps ids to slots in the compact users list and position arrays. A leaving user's
+    slot is filled with the last user, so both operations are O(1), and the position arrays are views
+    into buffers with spare capacity.
     """
 
     def __init__(
@@ -30,74 +38,181 @@ class UserManager:
         self.rng = config.rng
         self.logger = config.logger.getChild(__name__)
 
+        self.spherical_coordinates: ndarray = calc_user_spherical_coordinates(config=config, rng=self.rng)  # 3 x user_nr
+        self.cartesian_coordinates: ndarray = spherical_to_cartesian_coordinates(self.spherical_coordinates)
+
+        # position buffers 3 x capacity, the position arrays above are views of the first user_nr columns
+        self._spherical_coordinates_buffer: ndarray = self.spherical_coordinates
+        self._cartesian_coordinates_buffer: ndarray = self.cartesian_coordinates
+
         self.users: list = []
+        self.user_slots: dict = {}  # user id: slot
         self._initialize_users(config=config)
+        self._next_user_id: int = config.user_nr
+        self._user_args: dict = config.user_args
 
         self.logger.info('user setup complete')
 
     def calc_spherical_coordinates(
             self,
             config,
-    ) -> (ndarray, list):
-
-        # calculate average user positions
-        user_pos_average = (arange(0, config.user_nr) - (config.user_nr - 1) / 2) * config.user_dist_average
-
-        # add random value on user distances
-        random_factor = self.rng.uniform(low=-config.user_dist_bound,
-                                         high=config.user_dist_bound,
-                                         size=config.user_nr)
-        user_dist = user_pos_average + random_factor
-
-        # calculate user_aods_diff_earth_rad
-        user_aods_diff_earth_rad = zeros(config.user_nr)
-
-        for user_idx in range(config.user_nr):
-
-            if user_dist[user_idx] < 0:
-                user_aods_diff_earth_rad[user_idx] = -1 * arccos(1 - 0.5 * (user_dist[user_idx] / config.radius_earth)**2)
-            elif user_dist[user_idx] >= 0:
-                user_aods_diff_earth_rad[user_idx] = arccos(1 - 0.5 * (user_dist[user_idx] / config.radius_earth)**2)
-
-        user_center_aod_earth_rad = config.user_center_aod_earth_deg * pi / 180
-
-        # TODO: if any(user_pos_average == 0) == 1, vllt Fallunterscheidung für gerade und ungerade
+            batch_size: int = None,
+    ) -> ndarray:
 
-        # calculate user_aods_earth_rad
-        user_aods_earth_rad = user_center_aod_earth_rad + user_aods_diff_earth_rad
-
-        # create user objects
-        user_radii = config.radius_earth * ones(config.user_nr)
-        user_inclinations = pi / 2 * ones(config.user_nr)
-
-        user_spherical_coordinates = array([user_radii, user_inclinations, user_aods_earth_rad])
-
-        return user_spherical_coordinates
+        return calc_user_spherical_coordinates(config=config, rng=self.rng, batch_size=batch_size, user_nr=len(self.users))
 
     def _initialize_users(
             self,
             config: Config,
     ) -> None:
 
-        user_spherical_coordinates = self.calc_spherical_coordinates(config=config)
-
         for user_idx in range(config.user_nr):
             self.users.append(
                 User(
                     idx=user_idx,
-                    spherical_coordinates=user_spherical_coordinates[:, user_idx],
+                    spherical_coordinates=self.spherical_coordinates[:, user_idx],
+                    cartesian_coordinates=self.cartesian_coordinates[:, user_idx],
                     **config.user_args,
                 )
             )
+            self.user_slots[user_idx] = user_idx
 
     def update_positions(
             self,
             config,
     ) -> None:
 
-        user_spherical_coordinates = self.calc_spherical_coordinates(config=config)
+        # update all users at once, user objects hold views into these arrays
+        self.spherical_coordinates[:] = self.calc_spherical_coordinates(config=config)
+        spherical_to_cartesian_coordinates(self.spherical_coordinates, out=self.cartesian_coordinates)
+
+    def add_user(
+            self,
+            spherical_coordinates: ndarray,
+            gain_linear: float = None,
+    ) -> int:
+        """
+        Adds a user at the given position in the last slot, returns its id
+        """
+
+        slot = len(self.users)
+        if slot == self._spherical_coordinates_buffer.shape[1]:
+            self._grow_buffers()
+
+        self._spherical_coordinates_buffer[:, slot] = spherical_coordinates
+        spherical_to_cartesian_coordinates(
+            self._spherical_coordinates_buffer[:, slot], out=self._cartesian_coordinates_buffer[:, slot])
+
+        user_args = self._user_args if gain_linear is None else {**self._user_args, 'gain_linear': gain_linear}
+        user = User(
+            idx=slot,
+            spherical_coordinates=self._spherical_coordinates_buffer[:, slot],
+            cartesian_coordinates=self._cartesian_coordinates_buffer[:, slot],
+            user_id=self._next_user_id,
+            **user_args,
+        )
+        self._next_user_id += 1
+
+        self.users.append(user)
+        self.user_slots[user.id] = slot
+        self._bind_position_views()
+
+        return user.id
+
+    def remove_user(
+            self,
+            user_id: int,
+    ) -> None:
+        """
+        Removes a user, the last user takes its slot
+        """
+
+        slot = self.user_slots.pop(user_id)
+        last_user = self.users.pop()
+
+        if last_user.id != user_id:
+            self._spherical_coordinates_buffer[:, slot] = last_user.spherical_coordinates
+            self._cartesian_coordinates_buffer[:, slot] = last_user.cartesian_coordinates
+            last_user.idx = slot
+            last_user.spherical_coordinates = self._spherical_coordinates_buffer[:, slot]
+            last_user.cartesian_coordinates = self._cartesian_coordinates_buffer[:, slot]
+            self.users[slot] = last_user
+            self.user_slots[last_user.id] = slot
+
+        self._bind_position_views()
+
+    def get_user(
+            self,
+            user_id: int,
+    ) -> User:
+
+        return self.users[self.user_slots[user_id]]
+
+    def _grow_buffers(
+            self,
+    ) -> None:
+        """
+        Doubles the position buffer capacity, users take views into the new buffers
+        """
+
+        capacity = max(1, 2 * self._spherical_coordinates_buffer.shape[1])
+
+        spherical_coordinates_buffer = zeros((3, capacity))
+        cartesian_coordinates_buffer = zeros((3, capacity))
+        spherical_coordinates_buffer[:, :len(self.users)] = self.spherical_coordinates
+        cartesian_coordinates_buffer[:, :len(self.users)] = self.cartesian_coordinates
+        self._spherical_coordinates_buffer = spherical_coordinates_buffer
+        self._cartesian_coordinates_buffer = cartesian_coordinates_buffer
 
         for user in self.users:
-            user.update_position(
-                spherical_coordinates=user_spherical_coordinates[:, user.idx],
-            )
+            user.spherical_coordinates = self._spherical_coordinates_buffer[:, user.idx]
+            user.cartesian_coordinates = self._cartesian_coordinates_buffer[:, user.idx]
+
+    def _bind_position_views(
+            self,
+    ) -> None:
+
+        self.spherical_coordinates = self._spherical_coordinates_buffer[:, :len(self.users)]
+        self.cartesian_coordinates = self._cartesian_coordinates_buffer[:, :len(self.users)]
+
+
+def calc_user_spherical_coordinates(
+        config,
+        rng,
+        batch_size: int = None,
+        user_nr: int = None,
+) -> ndarray:
+    """
+    Draws user positions, returns spherical coordinates 3 x user_nr,
+    or 3 x batch_size x user_nr if a batch_size is given, user_nr defaults to config.user_nr
+    """
+
+    if user_nr is None:
+        user_nr = config.user_nr
+
+    # calculate average user positions
+    user_pos_average = (arange(0, user_nr) - (user_nr - 1) / 2) * config.user_dist_average
+
+    # add random value on user distances
+    random_factor = rng.uniform(low=-config.user_dist_bound,
+                                high=config.user_dist_bound,
+                                size=user_nr if batch_size is None else (batch_size, user_nr))
+    user_dist = user_pos_average + random_factor
+
+    # calculate user_aods_diff_earth_rad
+    user_aods_diff_earth_rad = sign(user_dist) * arccos(1 - 0.5 * (user_dist / config.radius_earth)**2)
+
+    user_center_aod_earth_rad = config.user_center_aod_earth_deg * pi / 180
+
+    # TODO: if any(user_pos_average == 0) == 1, vllt Fallunterscheidung für gerade und ungerade
+
+    # calculate user_aods_earth_rad
+    user_aods_earth_rad = user_center_aod_earth_rad + user_aods_diff_earth_rad
+
+    # create user objects
+    user_radii = config.radius_earth * ones(user_dist.shape)
+    user_inclinations = pi / 2 * ones(user_dist.shape)
+
+    user_spherical_coordinates = stack([user_radii, user_inclinations, user_aods_earth_rad])
+
+    return user_spherical_coordinates
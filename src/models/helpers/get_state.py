@@ -13,6 +13,7 @@ from src.utils.real_complex_vector_reshaping import (
 
 
 # TODO: Norm values hardcoded can cause problems with different applications
+# satellites may hold batched channel states, e.g., a vectorized environment, giving one state per leading index
 
 def get_state_erroneous_channel_state_information(
         satellites,
@@ -20,14 +21,15 @@ def get_state_erroneous_channel_state_information(
         norm_csi: bool,
 ) -> ndarray:
 
-    erroneous_csi = satellites.erroneous_channel_state_information.flatten()
+    erroneous_csi = satellites.erroneous_channel_state_information
+    erroneous_csi = erroneous_csi.reshape((*erroneous_csi.shape[:-2], -1))
 
     if csi_format == 'rad_phase':
         state_real = complex_vector_to_rad_and_phase(erroneous_csi)
         if norm_csi:
-            half_length_idx = int(len(state_real) / 2)
-            state_real[:half_length_idx] = state_real[:half_length_idx] * 1e7
-            state_real[half_length_idx:] = state_real[half_length_idx:] / pi
+            half_length_idx = int(state_real.shape[-1] / 2)
+            state_real[..., :half_length_idx] = state_real[..., :half_length_idx] * 1e7
+            state_real[..., half_length_idx:] = state_real[..., half_length_idx:] / pi
 
     elif csi_format == 'real_imag':
         state_real = complex_vector_to_double_real_vector(erroneous_csi)
@@ -46,4 +48,4 @@ def get_state_aods(
 
     state = satellites.get_aods_to_users()
 
-    return state.flatten()
+    return state.reshape((*state.shape[:-2], -1))
@@ -0,0 +1,244 @@
+
+from math import (
+    prod,
+)
+from multiprocessing import (
+    get_context,
+)
+from multiprocessing.shared_memory import (
+    SharedMemory,
+)
+from os import (
+    cpu_count,
+)
+from numpy import (
+    ndarray,
+    dtype as np_dtype,
+    array_split,
+    arange,
+    cumsum,
+    concatenate,
+)
+
+from src.models.helpers.satellite_beamforming_vec_env import (
+    SatelliteBeamformingVecEnv,
+)
+
+
+class SatelliteBeamformingProcessVecEnv:
+    """
+    SatelliteBeamformingVecEnv with the env_nr scenario copies spread over worker_nr worker processes,
+    e.g., one per core. Worker w owns the copies env_offsets[w]:env_offsets[w + 1] in its own
+    SatelliteBeamformingVecEnv, with random number streams config.rng_streams.child('worker', w).
+    Actions, states, rewards and the channel state information live in shared memory arrays that the
+    learner reads and writes directly, per step only a command is sent to every worker, no arrays
+    are pickled. Workers are forked, so the config is not pickled either.
+    States have the dtype of the in-process environment's states, taken from a one-copy probe on its
+    own random number stream.
+    Forking happens after the config module has imported TensorFlow, the workers only run the numpy
+    simulation and never call into TensorFlow, so create this environment before the learner builds
+    its networks and starts TensorFlow's threads.
+    Call close to stop the workers and release the shared memory.
+    """
+
+    def __init__(
+            self,
+            config,
+            env_nr: int,
+            worker_nr: int = None,
+    ) -> None:
+
+        self.env_nr: int = env_nr
+        self.worker_nr: int = min(env_nr, cpu_count() if worker_nr is None else worker_nr)
+
+        self.env_offsets: ndarray = concatenate(
+            ([0], cumsum([len(env_slice) for env_slice in array_split(arange(env_nr), self.worker_nr)])))
+
+        complex_dtype = 'complex128' if config.precision == 'double' else 'complex64'
+        state_dtype = SatelliteBeamformingVecEnv(
+            config=config,
+            env_nr=1,
+            rng_streams=config.rng_streams.child('state_dtype_probe'),
+        ).reset().dtype
+        self._shared_array_specs: dict = {  # name: shape, dtype
+            'actions': ((env_nr, config.config_learner.network_args['num_actions']), 'float32'),
+            'states': ((env_nr, config.config_learner.network_args['size_state']), state_dtype.name),
+            'rewards': ((env_nr,), 'float64'),
+            'channel_state_information': ((env_nr, config.user_nr, config.sat_tot_ant_nr), complex_dtype),
+            'erroneous_channel_state_information': ((env_nr, config.user_nr, config.sat_tot_ant_nr), complex_dtype),
+        }
+        self._shared_memories: dict = {
+            name: SharedMemory(create=True, size=int(np_dtype(array_dtype).itemsize * prod(shape)))
+            for name, (shape, array_dtype) in self._shared_array_specs.items()
+        }
+        self.shared_arrays: dict = _bind_shared_arrays(self._shared_memories, self._shared_array_specs)
+
+        context = get_context('fork')
+        self._connections: list = []
+        self._workers: list = []
+        for worker_idx in range(self.worker_nr):
+            connection, worker_connection = context.Pipe()
+            worker = context.Process(
+                target=_env_worker,
+                kwargs={
+                    'connection': worker_connection,
+                    'config': config,
+                    'worker_idx': worker_idx,
+                    'env_slice': slice(self.env_offsets[worker_idx], self.env_offsets[worker_idx + 1]),
+                    'shared_memory_names': {name: memory.name for name, memory in self._shared_memories.items()},
+                    'shared_array_specs': self._shared_array_specs,
+                },
+                daemon=True,
+            )
+            worker.start()
+            worker_connection.close()
+            self._connections.append(connection)
+            self._workers.append(worker)
+
+    # shared arrays, env_nr x ..., overwritten by every reset and step
+
+    @property
+    def states(
+            self,
+    ) -> ndarray:
+
+        return self.shared_arrays['states']
+
+    @property
+    def rewards(
+            self,
+    ) -> ndarray:
+
+        return self.shared_arrays['rewards']
+
+    @property
+    def channel_state_information(
+            self,
+    ) -> ndarray:
+
+        return self.shared_arrays['channel_state_information']
+
+    @property
+    def erroneous_channel_state_information(
+            self,
+    ) -> ndarray:
+
+        return self.shared_arrays['erroneous_channel_state_information']
+
+    def reset(
+            self,
+    ) -> ndarray:
+        """
+        Draws new scenarios for all copies, returns a copy of the states
+        """
+
+        self._run_workers('reset')
+
+        return self.states.copy()
+
+    def step(
+            self,
+            actions: ndarray,
+    ) -> tuple[ndarray, ndarray]:
+        """
+        Rewards the actions of all copies and advances them, returns copies of the next states and the rewards
+        """
+
+        self.shared_arrays['actions'][:] = actions
+        self._run_workers('step')
+
+        return self.states.copy(), self.rewards.copy()
+
+    def close(
+            self,
+    ) -> None:
+
+        if not self._workers:
+            return
+
+        self._run_workers('close')
+        for worker in self._workers:
+            worker.join()
+        self._workers = []
+
+        self.shared_arrays = {}
+        for memory in self._shared_memories.values():
+            memory.close()
+            memory.unlink()
+
+    def _run_workers(
+            self,
+            command: str,
+    ) -> None:
+        """
+        Sends command to all workers at once, then waits until all are done. All replies are
+        received before the first exception raised by a worker is raised, so none stay queued.
+        """
+
+        for connection in self._connections:
+            connection.send(command)
+        exceptions = [connection.recv() for connection in self._connections]
+        for exception in exceptions:
+            if exception is not None:
+                raise exception
+
+
+def _bind_shared_arrays(
+        shared_memories: dict,
+        shared_array_specs: dict,
+) -> dict:
+
+    return {
+        name: ndarray(shape, dtype=array_dtype, buffer=shared_memories[name].buf)
+        for name, (shape, array_dtype) in shared_array_specs.items()
+    }
+
+
+def _env_worker(
+        connection,
+        config,
+        worker_idx: int,
+        env_slice: slice,
+        shared_memory_names: dict,
+        shared_array_specs: dict,
+) -> None:
+    """
+    Steps the copies env_slice on the shared arrays on command: 'reset', 'step' or 'close'.
+    Replies None when done, or the exception raised.
+    """
+
+    shared_memories = {name: SharedMemory(name=memory_name) for name, memory_name in shared_memory_names.items()}
+    shared_arrays = {
+        name: shared_array[env_slice]
+        for name, shared_array in _bind_shared_arrays(shared_memories, shared_array_specs).items()
+    }
+
+    env = SatelliteBeamformingVecEnv(
+        config=config,
+        env_nr=env_slice.stop - env_slice.start,
+        rng_streams=config.rng_streams.child('worker', worker_idx),
+    )
+
+    while True:
+        command = connection.recv()
+        try:
+            if command == 'reset':
+                shared_arrays['states'][:] = env.reset()
+            elif command == 'step':
+                shared_arrays['states'][:], shared_arrays['rewards'][:] = env.step(shared_arrays['actions'])
+            elif command == 'close':
+                break
+            else:
+                raise ValueError(f'Unknown command {command}')
+
+            shared_arrays['channel_state_information'][:] = env.channel_state_information
+            shared_arrays['erroneous_channel_state_information'][:] = env.erroneous_channel_state_information
+        except Exception as exception:
+            connection.send(exception)
+            continue
+        connection.send(None)
+
+    shared_arrays = {}
+    for memory in shared_memories.values():
+        memory.close()
+    connection.send(None)
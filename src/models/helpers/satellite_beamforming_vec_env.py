@@ -0,0 +1,199 @@
+
+from numpy import (
+    ndarray,
+)
+
+from src.data.constellation_state import (
+    ConstellationState,
+)
+from src.data.satellite_manager import (
+    calc_satellite_spherical_coordinates,
+)
+from src.data.user_manager import (
+    calc_user_spherical_coordinates,
+)
+from src.data.orbit_trajectory import (
+    OrbitTrajectory,
+)
+from src.data.calc_sum_rate import (
+    calc_sum_rate,
+)
+from src.utils.real_complex_vector_reshaping import (
+    real_vector_to_half_complex_vector,
+)
+from src.utils.norm_precoder import (
+    norm_precoder,
+)
+from src.utils.rng_streams import (
+    RngStreams,
+)
+
+
+class SatelliteBeamformingVecEnv:
+    """
+    Runs env_nr independent copies of the satellite scenario in lockstep on one batched
+    ConstellationState. reset draws new scenarios, step takes one action per copy, i.e., an
+    env_nr x num_actions array of real precoder vectors, rewards it with the sum rate on the
+    current channel and advances all copies, like sim_update in train_sac.
+    States (env_nr x state_dim) are built by config.config_learner.get_state, which accepts this
+    environment in place of a SatelliteManager, rewards are env_nr.
+    Positions are drawn from the 'environment' stream and errors from the 'error_model' stream of
+    rng_streams, by default config.rng_streams.
+    """
+
+    def __init__(
+            self,
+            config,
+            env_nr: int,
+            rng_streams: RngStreams = None,
+    ) -> None:
+
+        self.config = config
+        self.env_nr: int = env_nr
+
+        if rng_streams is None:
+            rng_streams = config.rng_streams
+        self.rng = rng_streams.get_pooled('environment')
+        self.error_rng = rng_streams.get_pooled('error_model')
+
+        if config.sat_position_mode not in ('random', 'propagate'):
+            raise ValueError(f'Unknown satellite position mode {config.sat_position_mode}')
+        self.position_mode: str = config.sat_position_mode
+
+        # propagation mode, cached positions step_nr x 3 x env_nr x sat_nr
+        self.trajectory: OrbitTrajectory = OrbitTrajectory(config=config)
+
+        self.constellation_state = ConstellationState(
+            sat_nr=config.sat_nr,
+            user_nr=config.user_nr,
+            antenna_nr=config.sat_ant_nrs,
+            antenna_distance=config.sat_ant_dist,
+            antenna_gain_linear=config.sat_ant_gain_linear,
+            wavelength=config.wavelength,
+            center_aod_earth_deg=config.sat_center_aod_earth_deg,
+            steering_vector_cache_quantization=config.steering_vector_cache_quantization,
+            steering_vector_cache_interpolation=config.steering_vector_cache_interpolation,
+            precision=config.precision,
+            relative_aod_side=config.sat_position_mode == 'propagate',
+            batch_size=env_nr,
+        )
+        self.constellation_state.user_gain_linear[:] = config.user_gain_linear
+
+    # channel state information of every copy, env_nr x user_nr x tot_nr_antennas
+
+    @property
+    def channel_state_information(
+            self,
+    ) -> ndarray:
+
+        return self.constellation_state.channel_state
+
+    @property
+    def erroneous_channel_state_information(
+            self,
+    ) -> ndarray:
+
+        return self.constellation_state.erroneous_channel_state
+
+    def get_aods_to_users(
+            self,
+    ) -> ndarray:
+
+        return self.constellation_state.aods.swapaxes(-1, -2).copy()
+
+    def get_states(
+            self,
+    ) -> ndarray:
+
+        return self.config.config_learner.get_state(satellites=self, **self.config.config_learner.get_state_args)
+
+    def reset(
+            self,
+    ) -> ndarray:
+        """
+        Draws new scenarios for all copies, and in propagation mode new trajectories starting at
+        their first step, as SatelliteManager.reset_trajectory, returns the states
+        """
+
+        if self.position_mode == 'propagate':
+            self.trajectory.reset(
+                spherical_coordinates=calc_satellite_spherical_coordinates(
+                    config=self.config, rng=self.rng, batch_size=self.env_nr),
+            )
+
+        self._sim_update(advance_trajectory=False)
+
+        return self.get_states()
+
+    def step(
+            self,
+            actions: ndarray,
+    ) -> tuple[ndarray, ndarray]:
+        """
+        Rewards the actions of all copies on their current channel, then advances all copies,
+        returns the next states and the rewards
+        """
+
+        w_precoders = self.actions_to_precoders(actions)
+
+        rewards = calc_sum_rate(
+            channel_state=self.constellation_state.channel_state,
+            w_precoder=w_precoders,
+            noise_power_watt=self.config.noise_power_watt,
+        )
+
+        self._sim_update()
+
+        return self.get_states(), rewards
+
+    def close(
+            self,
+    ) -> None:
+        """
+        Nothing to release, counterpart of SatelliteBeamformingProcessVecEnv.close
+        """
+
+        pass
+
+    def actions_to_precoders(
+            self,
+            actions: ndarray,
+    ) -> ndarray:
+        """
+        Reshapes env_nr x num_actions real action vectors into normalized precoders env_nr x tot_nr_antennas x user_nr
+        """
+
+        w_precoders = real_vector_to_half_complex_vector(actions).reshape(
+            (self.env_nr, self.config.sat_tot_ant_nr, self.config.user_nr))
+
+        return norm_precoder(precoding_matrix=w_precoders, power_constraint_watt=self.config.power_constraint_watt,
+                             per_satellite=True, antenna_sat_idx=self.config.sat_antenna_sat_idx)
+
+    def _sim_update(
+            self,
+            advance_trajectory: bool = True,
+    ) -> None:
+
+        # same draw order as sim_update: users first, then satellites
+        self.constellation_state.update_user_positions(
+            spherical_coordinates=calc_user_spherical_coordinates(config=self.config, rng=self.rng, batch_size=self.env_nr),
+        )
+
+        if self.position_mode == 'propagate':
+            if advance_trajectory:
+                self.trajectory.advance()
+            self.constellation_state.update_satellite_positions(
+                spherical_coordinates=self.trajectory.spherical_coordinates,
+                cartesian_coordinates=self.trajectory.cartesian_coordinates,
+            )
+        else:
+            self.constellation_state.update_satellite_positions(
+                spherical_coordinates=calc_satellite_spherical_coordinates(config=self.config, rng=self.rng, batch_size=self.env_nr),
+            )
+
+        self.constellation_state.calculate_geometry()
+        self.constellation_state.calculate_channel_state(channel_model=self.config.channel_model)
+        self.constellation_state.calculate_erroneous_channel_state(
+            error_model_config=self.config.error_model,
+            rng=self.error_rng,
+        )
@@ -28,17 +28,14 @@ from matplotlib.pyplot import (
 from src.config.config import (
     Config,
 )
-from src.data.satellite_manager import (
-    SatelliteManager,
-)
-from src.data.user_manager import (
-    UserManager,
-)
 from src.models.algorithms.soft_actor_critic import (
     SoftActorCritic,
 )
-from src.data.channel.los_channel_model import (
-    los_channel_model,
+from src.models.helpers.satellite_beamforming_vec_env import (
+    SatelliteBeamformingVecEnv,
+)
+from src.models.helpers.satellite_beamforming_process_vec_env import (
+    SatelliteBeamformingProcessVecEnv,
 )
 from src.data.calc_sum_rate import (
     calc_sum_rate,
@@ -47,13 +44,7 @@ from src.data.precoder.mmse_precoder import (
     mmse_precoder_normalized,
 )
 from src.utils.real_complex_vector_reshaping import (
-    real_vector_to_half_complex_vector,
-    rad_and_phase_to_complex_vector,
     complex_vector_to_double_real_vector,
-    complex_vector_to_rad_and_phase,
-)
-from src.utils.norm_precoder import (
-    norm_precoder,
 )
 from src.utils.plot_sweep import (
     plot_sweep,
@@ -87,35 +78,25 @@ def train_sac_single_error(config) -> Path:
             return True
         return False
 
-    def sim_update():
-        user_manager.update_positions(config=config)
-        satellite_manager.update_positions(config=config)
-
-        satellite_manager.calculate_satellite_distances_to_users(users=user_manager.users)
-        satellite_manager.calculate_satellite_aods_to_users(users=user_manager.users)
-        satellite_manager.calculate_steering_vectors_to_users(users=user_manager.users)
-        satellite_manager.update_channel_state_information(channel_model=los_channel_model, users=user_manager.users)
-        satellite_manager.update_erroneous_channel_state_information(error_model_config=config.error_model, users=user_manager.users)
-
-    def add_mmse_experience():
+    def add_mmse_experience(env_idx):
 
         # this needs to use erroneous csi, otherwise the data distribution in buffer
         #  is changed significantly from reality, i.e., the learner gets too much confidence that
         #  the csi is reliable
         w_mmse = mmse_precoder_normalized(
-            channel_matrix=satellite_manager.erroneous_channel_state_information,
+            channel_matrix=env.erroneous_channel_state_information[env_idx],
             **config.mmse_args
         )
         reward_mmse = calc_sum_rate(
-            channel_state=satellite_manager.channel_state_information,
+            channel_state=env.channel_state_information[env_idx],
             w_precoder=w_mmse,
             noise_power_watt=config.noise_power_watt,
         )
         mmse_experience = {
-            'state': state_current,
+            'state': states_current[env_idx],
             'action': complex_vector_to_double_real_vector(w_mmse.flatten()),
             'reward': reward_mmse,
-            'next_state': state_next,
+            'next_state': states_next[env_idx],
         }
         sac.add_experience(mmse_experience)
 
@@ -179,109 +160,102 @@ def train_sac_single_error(config) -> Path:
         with gzip_open(Path(results_path, name), 'wb') as file:
             pickle_dump(metrics, file=file)
 
-    satellite_manager = SatelliteManager(config=config)
-    user_manager = UserManager(config=config)
-    sac = SoftActorCritic(rng=config.rng, **config.config_learner.algorithm_args)
-
-    metrics: dict = {
-        'mean_sum_rate_per_episode': -infty * ones(config.config_learner.training_episodes)
-    }
-    high_score = -infty
-    high_scores = []
-
-    real_time_start = datetime.now()
-
-    profiler = None
-    if config.profile:
-        profiler = start_profiling()
-
-    step_experience: dict = {'state': 0, 'action': 0, 'reward': 0, 'next_state': 0}
-
-    for training_episode_id in range(config.config_learner.training_episodes):
-
-        episode_metrics: dict = {
-            'sum_rate_per_step': -infty * ones(config.config_learner.training_steps_per_episode),
-            'mean_log_prob_density': infty * ones(config.config_learner.training_steps_per_episode),
-            'value_loss': -infty * ones(config.config_learner.training_steps_per_episode),
+    # environment workers are forked before the learner builds its networks
+    if config.config_learner.training_env_worker_nr > 0:
+        env = SatelliteBeamformingProcessVecEnv(config=config, env_nr=config.config_learner.training_env_nr,
+                                                worker_nr=config.config_learner.training_env_worker_nr)
+    else:
+        env = SatelliteBeamformingVecEnv(config=config, env_nr=config.config_learner.training_env_nr)
+    try:
+        training_rng = config.rng_streams.get_pooled('training')
+        sac = SoftActorCritic(rng=config.rng_streams.get('learner'), **config.config_learner.algorithm_args)
+
+        metrics: dict = {
+            'mean_sum_rate_per_episode': -infty * ones(config.config_learner.training_episodes)
         }
-
-        sim_update()
-
-        state_next = config.config_learner.get_state(satellites=satellite_manager, **config.config_learner.get_state_args)
-
-        for training_step_id in range(config.config_learner.training_steps_per_episode):
-
-            simulation_step = training_episode_id * config.config_learner.training_steps_per_episode + training_step_id
-
-            # determine state
-            state_current = state_next
-            step_experience['state'] = state_current
-
-            # determine action based on state
-            action = sac.get_action(state=state_current)
-            step_experience['action'] = action
-
-            # reshape to fit reward calculation
-            w_precoder_vector = real_vector_to_half_complex_vector(action)
-            w_precoder = w_precoder_vector.reshape((config.sat_nr*config.sat_ant_nr, config.user_nr))
-            w_precoder_normed = norm_precoder(precoding_matrix=w_precoder, power_constraint_watt=config.power_constraint_watt,
-                                              per_satellite=True, sat_nr=config.sat_nr, sat_ant_nr=config.sat_ant_nr)
-
-            # step simulation based on action, determine reward
-            reward = calc_sum_rate(
-                channel_state=satellite_manager.channel_state_information,
-                w_precoder=w_precoder_normed,
-                noise_power_watt=config.noise_power_watt,
-            )
-            step_experience['reward'] = reward
-
-            # optionally add the corresponding mmse precoder to the data set
-            if config.rng.random() < config.config_learner.percentage_mmse_samples_added_to_exp_buffer:
-                add_mmse_experience()  # todo note: currently state_next saved in the mmse experience is not correct
-
-            # update simulation state
-            sim_update()
-
-            # get new state
-            state_next = config.config_learner.get_state(satellites=satellite_manager, **config.config_learner.get_state_args)
-            step_experience['next_state'] = state_next
-
-            sac.add_experience(experience=step_experience)
-
-            # train allocator off-policy
-            train_policy = False
-            if policy_training_criterion():
-                train_policy = True
-            mean_log_prob_density, value_loss = sac.train(
-                toggle_train_value_networks=True,
-                toggle_train_policy_network=train_policy,
-                toggle_train_entropy_scale_alpha=True,
-            )
-
-            # log results
-            episode_metrics['sum_rate_per_step'][training_step_id] = reward
-            episode_metrics['mean_log_prob_density'][training_step_id] = mean_log_prob_density
-            episode_metrics['value_loss'][training_step_id] = value_loss
-
-            if config.verbosity > 0:
-                if training_step_id % 50 == 0:
-                    progress_print()
-
-        # log episode results
-        episode_mean_sum_rate = mean(episode_metrics['sum_rate_per_step'])
-        metrics['mean_sum_rate_per_episode'][training_episode_id] = episode_mean_sum_rate
-        if config.verbosity == 1:
-            print(f' Episode mean reward: {episode_mean_sum_rate:.4f}'
-                  f' std {std(episode_metrics["sum_rate_per_step"]):.2f},'
-                  f' current exploration: {mean(episode_metrics["mean_log_prob_density"]):.2f},'
-                  f' value loss: {mean(episode_metrics["value_loss"]):.5f}'
-                  )
-
-        # save network snapshot
-        if episode_mean_sum_rate > high_score:
-            high_score = mean(episode_metrics['sum_rate_per_step'])
-            high_scores.append(high_score)
-            best_model_path = save_model_checkpoint(extra=episode_mean_sum_rate)
+        high_score = -infty
+        high_scores = []
+
+        real_time_start = datetime.now()
+
+        profiler = None
+        if config.profile:
+            profiler = start_profiling()
+
+        step_experience: dict = {'state': 0, 'action': 0, 'reward': 0, 'next_state': 0}
+
+        for training_episode_id in range(config.config_learner.training_episodes):
+
+            episode_metrics: dict = {
+                'sum_rate_per_step': -infty * ones(config.config_learner.training_steps_per_episode),
+                'mean_log_prob_density': infty * ones(config.config_learner.training_steps_per_episode),
+                'value_loss': -infty * ones(config.config_learner.training_steps_per_episode),
+            }
+
+            states_next = env.reset()
+
+            for training_step_id in range(config.config_learner.training_steps_per_episode):
+
+                simulation_step = training_episode_id * config.config_learner.training_steps_per_episode + training_step_id
+
+                # determine states of all environment copies
+                states_current = states_next
+
+                # determine actions based on states
+                actions = sac.get_action(state=states_current).reshape((env.env_nr, -1))
+
+                # optionally add the corresponding mmse precoders to the data set
+                for env_idx in range(env.env_nr):
+                    if training_rng.random() < config.config_learner.percentage_mmse_samples_added_to_exp_buffer:
+                        add_mmse_experience(env_idx)  # todo note: currently state_next saved in the mmse experience is not correct
+
+                # step simulation based on actions, determine rewards, get new states
+                states_next, rewards = env.step(actions)
+
+                for env_idx in range(env.env_nr):
+                    step_experience['state'] = states_current[env_idx]
+                    step_experience['action'] = actions[env_idx]
+                    step_experience['reward'] = rewards[env_idx]
+                    step_experience['next_state'] = states_next[env_idx]
+
+                    sac.add_experience(experience=step_experience)
+
+                # train allocator off-policy
+                train_policy = False
+                if policy_training_criterion():
+                    train_policy = True
+                mean_log_prob_density, value_loss = sac.train(
+                    toggle_train_value_networks=True,
+                    toggle_train_policy_network=train_policy,
+                    toggle_train_entropy_scale_alpha=True,
+                )
+
+                # log results
+                episode_metrics['sum_rate_per_step'][training_step_id] = mean(rewards)
+                episode_metrics['mean_log_prob_density'][training_step_id] = mean_log_prob_density
+                episode_metrics['value_loss'][training_step_id] = value_loss
+
+                if config.verbosity > 0:
+                    if training_step_id % 50 == 0:
+                        progress_print()
+
+            # log episode results
+            episode_mean_sum_rate = mean(episode_metrics['sum_rate_per_step'])
+            metrics['mean_sum_rate_per_episode'][training_episode_id] = episode_mean_sum_rate
+            if config.verbosity == 1:
+                print(f' Episode mean reward: {episode_mean_sum_rate:.4f}'
+                      f' std {std(episode_metrics["sum_rate_per_step"]):.2f},'
+                      f' current exploration: {mean(episode_metrics["mean_log_prob_density"]):.2f},'
+                      f' value loss: {mean(episode_metrics["value_loss"]):.5f}'
+                      )
+
+            # save network snapshot
+            if episode_mean_sum_rate > high_score:
+                high_score = mean(episode_metrics['sum_rate_per_step'])
+                high_scores.append(high_score)
+                best_model_path = save_model_checkpoint(extra=episode_mean_sum_rate)
+    finally:
+        env.close()
 
     # end compute performance profiling
     if profiler is not None:
@@ -0,0 +1,29 @@
+
+from numpy import (
+    ndarray,
+    arange,
+    repeat,
+    newaxis,
+    sqrt,
+)
+
+
+def calc_orbit_trajectory(
+        spherical_coordinates: ndarray,
+        time_step_s: float,
+        step_nr: int,
+        gravitational_parameter: float,
+) -> ndarray:
+    """
+    Propagates satellites (3 x sat_nr spherical coordinates, or 3 x batch_size x sat_nr) along circular
+    orbits in their azimuth plane, returns step_nr x 3 x (batch_size x) sat_nr, starting with the given positions.
+    The angular velocity of a circular orbit is sqrt(gravitational_parameter / radius^3).
+    """
+
+    angular_velocity = sqrt(gravitational_parameter / spherical_coordinates[0] ** 3)
+
+    trajectory = repeat(spherical_coordinates[newaxis], step_nr, axis=0)
+    time_steps = arange(step_nr).reshape((step_nr, *[1] * (spherical_coordinates.ndim - 1)))
+    trajectory[:, 2, ...] += time_steps * time_step_s * angular_velocity
+
+    return trajectory
@@ -10,7 +10,8 @@ def euclidian_distance(
         vec_2: ndarray,
 ) -> ndarray:
     """
-    This function calculates the euclidean distance between two 3D vectors
+    This function calculates the euclidean distance between two 3D vectors,
+    or between stacks of 3D vectors (3 x ...) that broadcast against each other
     """
 
     x_dist = vec_1[0] - vec_2[0]
@@ -0,0 +1,23 @@
+
+from numpy import (
+    ndarray,
+    arange,
+    asarray,
+    nonzero,
+    newaxis,
+)
+
+
+def get_antenna_layout(
+        antenna_nrs,
+) -> tuple[ndarray, ndarray]:
+    """
+    Flat antenna layout of satellites with antenna_nrs antennas each, antenna major:
+    ant 1 sat 1, ant 1 sat 2, ..., ant 2 sat 1, ..., satellites with fewer antennas are skipped.
+    Returns the satellite and the antenna index within its satellite of every antenna column.
+    """
+
+    antenna_nrs = asarray(antenna_nrs)
+    antenna_idx, antenna_sat_idx = nonzero(arange(antenna_nrs.max())[:, newaxis] < antenna_nrs)
+
+    return antenna_sat_idx.astype('int64'), antenna_idx.astype('int64')
@@ -0,0 +1,54 @@
+
+try:
+    from numba import (
+        njit,
+    )
+    numba_available: bool = True
+except ImportError:
+    numba_available: bool = False
+
+
+_kernel_backend: dict = {
+    'name': 'numpy',
+}
+
+
+def set_kernel_backend(
+        name: str,
+        logger=None,
+) -> str:
+    """
+    Selects the backend of functions with a compiled kernel, 'numpy' or 'numba'.
+    Falls back to 'numpy' if numba is not installed. Returns the selected backend.
+    """
+
+    if name not in ('numpy', 'numba'):
+        raise ValueError(f'Unknown kernel backend {name}')
+
+    if name == 'numba' and not numba_available:
+        if logger is not None:
+            logger.warning('numba not available, falling back to numpy kernel backend')
+        name = 'numpy'
+
+    _kernel_backend['name'] = name
+
+    return name
+
+
+def use_jit_kernels() -> bool:
+
+    return _kernel_backend['name'] == 'numba'
+
+
+def jit_kernel(
+        function,
+):
+    """
+    Decorator, compiles a kernel with numba on first call if available, leaves it as is otherwise.
+    Kernels are only called if the numba backend is selected.
+    """
+
+    if not numba_available:
+        return function
+
+    return njit(cache=True)(function)
@@ -2,8 +2,17 @@
 from numpy import (
     ndarray,
     sqrt,
-    matmul,
-    trace,
+    arange,
+    tile,
+    zeros,
+    where,
+    inf,
+    newaxis,
+)
+
+from src.utils.kernel_backend import (
+    use_jit_kernels,
+    jit_kernel,
 )
 
 
@@ -13,30 +22,67 @@ def norm_precoder(
         per_satellite,
         sat_nr=1,
         sat_ant_nr=1,
+        antenna_sat_idx: ndarray = None,
 ) -> ndarray:
     """
-    normalizes precoding matrix of dimension (sat_nr * ant_nr, user_nr)
-    with sat 1 ant 1, sat1 ant 2, sat1 ant 3, sat 2 ant 1...
+    normalizes precoding matrix of dimension (tot_ant_nr, user_nr) in place and returns it
+    with ant 1 sat 1, ant 1 sat 2, ..., ant 2 sat 1, ... as in the channel state information
+    antenna_sat_idx holds the satellite of every row, which allows for different antenna
+    numbers per satellite. Without antenna_sat_idx, every satellite has sat_ant_nr.
 
     tr(A^H * A) is the sum of squared elements
     after applying norm_factor, the trace of norm_factor * (A^H * A) will be == power_constraint_watt
+    per satellite, satellites without precoding power (e.g., not visible to any user) stay zero
+    precoding_matrix may have leading dimensions, e.g., ... x tot_ant_nr x user_nr for subcarriers,
+    every matrix is normalized on its own
+    With the numba kernel backend, a compiled kernel is used.
     """
 
-    if per_satellite:
+    if antenna_sat_idx is None:
+        antenna_sat_idx = tile(arange(sat_nr), sat_ant_nr)
+    sat_nr = int(antenna_sat_idx.max()) + 1
+
+    if not per_satellite:
+        sat_nr = 1
+        antenna_sat_idx = zeros(precoding_matrix.shape[-2], dtype='int64')
+
+    if use_jit_kernels() and precoding_matrix.ndim == 2:
+        _norm_precoder_kernel(precoding_matrix, power_constraint_watt / sat_nr, antenna_sat_idx, sat_nr)
+        return precoding_matrix
+
+    # squared elements summed per antenna row, then per satellite in one product, ... x sat_nr
+    row_power = (precoding_matrix.real ** 2 + precoding_matrix.imag ** 2).sum(axis=-1)
+    power_slice = row_power @ (antenna_sat_idx[:, newaxis] == arange(sat_nr))
+    power_slice = where(power_slice == 0, inf, power_slice)  # zero norm factor
+    norm_factor_slice = sqrt(power_constraint_watt / sat_nr / power_slice)
 
-        for satellite_id in range(sat_nr):
-            w_precoder_slice = precoding_matrix[satellite_id * sat_ant_nr: satellite_id * sat_ant_nr + sat_ant_nr, :]
-            norm_factor_slice = sqrt(
-                power_constraint_watt / sat_nr / trace(matmul(w_precoder_slice.conj().T, w_precoder_slice))
-            )
-            w_precoder_slice_normed = norm_factor_slice * w_precoder_slice
-            precoding_matrix[satellite_id * sat_ant_nr: satellite_id * sat_ant_nr + sat_ant_nr, :] = w_precoder_slice_normed
+    precoding_matrix *= norm_factor_slice[..., antenna_sat_idx, newaxis]
 
-        normalized_precoder = precoding_matrix
+    return precoding_matrix
+
+
+@jit_kernel
+def _norm_precoder_kernel(
+        precoding_matrix: ndarray,
+        power_constraint_watt_per_slice: float,
+        row_slice_idx: ndarray,
+        slice_nr: int,
+) -> None:
+    """
+    normalizes the rows of every slice, row_slice_idx holds the slice of every row, in place,
+    tr(A^H * A) is the sum of squared magnitudes
+    """
 
-    else:
+    squared_sums = zeros(slice_nr)
+    for row_idx in range(precoding_matrix.shape[0]):
+        for column_idx in range(precoding_matrix.shape[1]):
+            squared_sums[row_slice_idx[row_idx]] += abs(precoding_matrix[row_idx, column_idx]) ** 2
 
-        norm_factor = sqrt(power_constraint_watt / trace(matmul(precoding_matrix.conj().T, precoding_matrix)))
-        normalized_precoder = norm_factor * precoding_matrix
+    for row_idx in range(precoding_matrix.shape[0]):
+        squared_sum = squared_sums[row_slice_idx[row_idx]]
+        if squared_sum == 0:
+            continue
 
-    return normalized_precoder
+        norm_factor_slice = sqrt(power_constraint_watt_per_slice / squared_sum)
+        for column_idx in range(precoding_matrix.shape[1]):
+            precoding_matrix[row_idx, column_idx] *= norm_factor_slice
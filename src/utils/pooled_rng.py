@@ -0,0 +1,100 @@
+
+from math import (
+    prod,
+)
+from numbers import (
+    Integral,
+)
+from numpy import (
+    ndarray,
+    concatenate,
+)
+from numpy.random import (
+    Generator,
+)
+
+
+class PooledRng:
+    """
+    Buffered drop-in for the Generator methods used by the simulation, random, uniform and normal.
+    For every distribution and parameter set, block_size values are pre-drawn in one Generator call
+    and handed out in slices, so many small draws cost one Generator call per block.
+    Requests larger than a block, or with parameter arrays (e.g., per realization error magnitudes),
+    are drawn directly.
+    Results are reproducible for a seeded generator and the same sequence of requests. If only one
+    distribution and parameter set is drawn, the results are identical to the unpooled generator's.
+    """
+
+    def __init__(
+            self,
+            rng: Generator,
+            block_size: int,
+    ) -> None:
+
+        self.rng: Generator = rng
+        self.block_size: int = block_size
+
+        self._pools: dict = {}  # (distribution, *parameters): [values, position]
+
+    def random(
+            self,
+            size=None,
+    ):
+
+        return self._take(('random',), size)
+
+    def uniform(
+            self,
+            low: float = 0.0,
+            high: float = 1.0,
+            size=None,
+    ):
+
+        return self._take(('uniform', low, high), size)
+
+    def normal(
+            self,
+            loc: float = 0.0,
+            scale: float = 1.0,
+            size=None,
+    ):
+
+        return self._take(('normal', loc, scale), size)
+
+    def _take(
+            self,
+            pool_key: tuple,
+            size,
+    ):
+
+        if size is None:
+            sample_nr = 1
+        elif isinstance(size, Integral):
+            sample_nr = size
+        else:
+            sample_nr = prod(size)
+
+        distribution = getattr(self.rng, pool_key[0])
+
+        if sample_nr > self.block_size or any(isinstance(parameter, ndarray) for parameter in pool_key[1:]):
+            return distribution(*pool_key[1:], size=size)
+
+        pool = self._pools.get(pool_key)
+        if pool is None:
+            pool = [distribution(*pool_key[1:], size=0), 0]
+            self._pools[pool_key] = pool
+
+        values, position = pool
+        if position + sample_nr > len(values):
+            values = concatenate([values[position:], distribution(*pool_key[1:], size=self.block_size)])
+            position = 0
+            pool[0] = values
+
+        pool[1] = position + sample_nr
+
+        if size is None:
+            return float(values[position])
+
+        samples: ndarray = values[position:position + sample_nr].reshape(size)
+
+        return samples.copy()  # not a view into the pool
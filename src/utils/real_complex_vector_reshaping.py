@@ -10,12 +10,14 @@ from numpy import (
     arctan2,
 )
 
+# all conversions act on the last axis, leading axes, e.g., one per environment, are kept
+
 
 def complex_vector_to_double_real_vector(
         input_vector: ndarray,
 ) -> ndarray:
 
-    return concatenate([real(input_vector), imag(input_vector)],
+    return concatenate([real(input_vector), imag(input_vector)], axis=-1,
                        dtype='float32')
 
 
@@ -23,9 +25,9 @@ def real_vector_to_half_complex_vector(
         input_vector: ndarray,
 ) -> ndarray:
 
-    real_part_cutoff_index = int(len(input_vector) / 2)
+    real_part_cutoff_index = int(input_vector.shape[-1] / 2)
 
-    half_length_complex_vector = input_vector[:real_part_cutoff_index] + 1j * input_vector[real_part_cutoff_index:]
+    half_length_complex_vector = input_vector[..., :real_part_cutoff_index] + 1j * input_vector[..., real_part_cutoff_index:]
 
     return half_length_complex_vector
 
@@ -37,18 +39,18 @@ def complex_vector_to_rad_and_phase(
     radius = sqrt(real(input_vector)**2 + imag(input_vector)**2)
     angle = arctan2(imag(input_vector), real(input_vector))
 
-    return concatenate([radius, angle])
+    return concatenate([radius, angle], axis=-1)
 
 
 def rad_and_phase_to_complex_vector(
         input_vector: ndarray,
 ) -> ndarray:
 
-    real_part_cutoff_index = int(len(input_vector) / 2)
+    real_part_cutoff_index = int(input_vector.shape[-1] / 2)
 
     half_length_complex_vector = (
-            input_vector[:real_part_cutoff_index] * cos(input_vector[real_part_cutoff_index:])
-            + 1j * input_vector[:real_part_cutoff_index] * sin(input_vector[real_part_cutoff_index:])
+            input_vector[..., :real_part_cutoff_index] * cos(input_vector[..., real_part_cutoff_index:])
+            + 1j * input_vector[..., :real_part_cutoff_index] * sin(input_vector[..., real_part_cutoff_index:])
     )
 
     return half_length_complex_vector
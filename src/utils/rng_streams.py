@@ -0,0 +1,95 @@
+
+from zlib import (
+    crc32,
+)
+from numpy.random import (
+    Generator,
+    SeedSequence,
+    default_rng,
+)
+
+from src.utils.pooled_rng import (
+    PooledRng,
+)
+
+
+class RngStreams:
+    """
+    Derives independent, reproducible random number streams from one root seed.
+    Named streams (e.g., 'environment', 'error_model') and child stream sets (e.g., per worker or
+    per sweep point) are SeedSequence children of the root, as with SeedSequence.spawn, but their
+    spawn keys are derived from name and index, so they do not depend on the order of requests.
+    If seed is None, fresh entropy is drawn, which is available as self.seed for reproduction.
+    If a pool_block_size is given, get_pooled returns streams that pre-draw random numbers in blocks.
+    """
+
+    def __init__(
+            self,
+            seed: int = None,
+            spawn_key: tuple = (),
+            pool_block_size: int = None,
+    ) -> None:
+
+        self.seed_sequence: SeedSequence = SeedSequence(entropy=seed, spawn_key=spawn_key)
+        self.seed: int = self.seed_sequence.entropy
+        self.pool_block_size: int = pool_block_size
+
+        self._streams: dict = {}
+        self._pooled_streams: dict = {}
+
+    def get(
+            self,
+            name: str,
+    ) -> Generator:
+        """
+        Returns the generator for stream name, the same generator object on repeated calls
+        """
+
+        if name not in self._streams:
+            self._streams[name] = default_rng(
+                SeedSequence(
+                    entropy=self.seed,
+                    spawn_key=self.seed_sequence.spawn_key + (_name_to_key(name),),
+                )
+            )
+
+        return self._streams[name]
+
+    def get_pooled(
+            self,
+            name: str,
+    ):
+        """
+        Returns a PooledRng on the generator of stream name, which supports random, uniform and normal.
+        Without a pool_block_size, returns the generator itself.
+        """
+
+        if self.pool_block_size is None:
+            return self.get(name)
+
+        if name not in self._pooled_streams:
+            self._pooled_streams[name] = PooledRng(rng=self.get(name), block_size=self.pool_block_size)
+
+        return self._pooled_streams[name]
+
+    def child(
+            self,
+            name: str,
+            idx: int = 0,
+    ) -> 'RngStreams':
+        """
+        Returns an independent set of streams, e.g., child('worker', worker_idx)
+        """
+
+        return RngStreams(
+            seed=self.seed,
+            spawn_key=self.seed_sequence.spawn_key + (_name_to_key(name), idx),
+            pool_block_size=self.pool_block_size,
+        )
+
+
+def _name_to_key(
+        name: str,
+) -> int:
+
+    return crc32(name.encode())
@@ -9,16 +9,18 @@ from numpy import (
 
 def spherical_to_cartesian_coordinates(
         spherical_coordinates: ndarray,
+        out: ndarray = None,
 ) -> ndarray:
     """
     This function transforms a spherical coordinate vector with (radius,
-    inclination, azimuth) into a spherical coordinate vector (x,y,z)
+    inclination, azimuth) into a spherical coordinate vector (x,y,z).
+    Also accepts stacked coordinates of shape 3 x ..., optionally written into a preallocated out
         x = radius * sin(inclination) * cos(azimuth)
         y = radius * sin(inclination) * sin(azimuth)
         z = radius * cos(inclination)
     """
 
-    cartesian_coordinates = zeros(3)
+    cartesian_coordinates = zeros(spherical_coordinates.shape) if out is None else out
     cartesian_coordinates[0] = spherical_coordinates[0] * sin(spherical_coordinates[1]) * cos(spherical_coordinates[2])
     cartesian_coordinates[1] = spherical_coordinates[0] * sin(spherical_coordinates[1]) * sin(spherical_coordinates[2])
     cartesian_coordinates[2] = spherical_coordinates[0] * cos(spherical_coordinates[1])
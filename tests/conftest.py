@@ -0,0 +1,14 @@
+
+import sys
+from types import (
+    ModuleType,
+)
+
+# The data classes import src.config.config only for the Config type hint. Without TensorFlow, the
+#  config module cannot be imported, then a stand-in providing the name lets the real classes be tested.
+try:
+    import src.config.config
+except ImportError:
+    config_module = ModuleType('src.config.config')
+    config_module.Config = object
+    sys.modules['src.config.config'] = config_module
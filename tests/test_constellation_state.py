@@ -0,0 +1,197 @@
+
+import logging
+from types import (
+    SimpleNamespace,
+)
+
+from numpy import (
+    array,
+    pi,
+    array_equal,
+    newaxis,
+)
+from scipy import (
+    constants,
+)
+
+from src.data.constellation_state import (
+    ConstellationState,
+)
+from src.data.satellite_manager import (
+    SatelliteManager,
+)
+from src.data.user_manager import (
+    UserManager,
+)
+from src.data.channel.los_channel_model import (
+    los_channel_model,
+)
+from src.utils.rng_streams import (
+    RngStreams,
+)
+
+
+def make_config(
+        user_nr: int,
+) -> SimpleNamespace:
+
+    rng_streams = RngStreams(seed=0)
+    wavelength = constants.value('speed of light in vacuum') / (2 * 10**9)
+    sat_ant_nrs = [2, 4, 3]
+
+    return SimpleNamespace(
+        rng=rng_streams.get_pooled('environment'),
+        rng_streams=rng_streams,
+        logger=logging.getLogger(),
+        radius_earth=6378.1 * 10**3,
+        radius_orbit=(6378.1 + 600) * 10**3,
+        user_nr=user_nr,
+        user_dist_average=1_000,
+        user_dist_bound=30,
+        user_center_aod_earth_deg=90,
+        user_args={'gain_linear': 1.0},
+        sat_nr=len(sat_ant_nrs),
+        sat_ant_nrs=sat_ant_nrs,
+        sat_ant_dist=3 * wavelength / 2,
+        sat_ant_gain_linear=100 / sum(sat_ant_nrs),
+        sat_dist_average=10_000,
+        sat_dist_bound=0,
+        sat_center_aod_earth_deg=90,
+        sat_min_elevation_deg=None,
+        sat_position_mode='random',
+        orbit_time_step_s=0.1,
+        orbit_trajectory_steps=1_000,
+        earth_gravitational_parameter=3.986004418 * 10**14,
+        wavelength=wavelength,
+        subcarrier_wavelengths=None,
+        steering_vector_cache_quantization=None,
+        steering_vector_cache_interpolation=False,
+        precision='double',
+        satellite_args={
+            'rng': rng_streams.get_pooled('environment'),
+            'antenna_distance': 3 * wavelength / 2,
+            'antenna_gain_linear': 100 / sum(sat_ant_nrs),
+            'freq': 2 * 10**9,
+            'center_aod_earth_deg': 90,
+        },
+    )
+
+
+def calc_reference_channel_state(
+        config,
+        satellite_manager: SatelliteManager,
+        users: list,
+) -> tuple:
+    """
+    Full recompute on a fresh constellation state
+    """
+
+    constellation_state = ConstellationState(
+        sat_nr=config.sat_nr,
+        user_nr=len(users),
+        antenna_nr=config.sat_ant_nrs,
+        antenna_distance=config.sat_ant_dist,
+        antenna_gain_linear=config.sat_ant_gain_linear,
+        wavelength=config.wavelength,
+        center_aod_earth_deg=config.sat_center_aod_earth_deg,
+    )
+    constellation_state.update_satellite_positions(
+        spherical_coordinates=satellite_manager.constellation_state.sat_spherical_coordinates)
+    constellation_state.update_users(users=users)
+    constellation_state.calculate_geometry()
+    constellation_state.calculate_channel_state(channel_model=los_channel_model)
+
+    return constellation_state._mirrored_users, constellation_state.channel_state
+
+
+def test_remove_add_update_positions_equal_full_recompute():
+
+    config = make_config(user_nr=6)
+    rng = RngStreams(seed=1).get('test')
+
+    user_manager = UserManager(config=config)
+    satellite_manager = SatelliteManager(config=config)
+
+    for step in range(30):
+        if step % 3 == 0:
+            user_manager.remove_user(user_manager.users[rng.integers(len(user_manager.users))].id)
+        elif step % 3 == 1:
+            user_manager.add_user(array([config.radius_earth, pi / 2, pi / 2 + rng.uniform(-3e-4, 3e-4)]))
+        else:
+            user_manager.update_positions(config=config)
+
+        satellite_manager.calculate_satellite_distances_to_users(users=user_manager.users)
+        satellite_manager.calculate_satellite_aods_to_users()
+        satellite_manager.calculate_steering_vectors_to_users()
+        satellite_manager.update_channel_state_information(channel_model=los_channel_model, users=user_manager.users)
+
+        mirrored_users, channel_state = calc_reference_channel_state(config, satellite_manager, user_manager.users)
+
+        assert array_equal(satellite_manager.constellation_state._mirrored_users, mirrored_users)
+        assert array_equal(satellite_manager.channel_state_information, channel_state)
+
+
+def test_relative_aod_side_follows_satellite_azimuth():
+
+    config = make_config(user_nr=3)
+    user_manager = UserManager(config=config)
+
+    constellation_state = ConstellationState(
+        sat_nr=2,
+        user_nr=3,
+        antenna_nr=2,
+        antenna_distance=config.sat_ant_dist,
+        antenna_gain_linear=config.sat_ant_gain_linear,
+        wavelength=config.wavelength,
+        center_aod_earth_deg=config.sat_center_aod_earth_deg,
+        relative_aod_side=True,
+    )
+    constellation_state.update_satellite_positions(spherical_coordinates=array([
+        [config.radius_orbit] * 2,
+        [pi / 2] * 2,
+        [pi / 2 - 0.05, pi / 2 + 0.05],  # one satellite behind, one ahead of all users
+    ]))
+    constellation_state.update_users(users=user_manager.users)
+    constellation_state.calculate_geometry()
+
+    assert (constellation_state.aods[:, 0] > pi / 2).all()
+    assert (constellation_state.aods[:, 1] < pi / 2).all()
+
+
+
+def test_relative_aod_side_batched_equals_unbatched():
+
+    config = make_config(user_nr=3)
+    user_manager = UserManager(config=config)
+
+    sat_spherical_coordinates = array([
+        [config.radius_orbit] * 2,
+        [pi / 2] * 2,
+        [pi / 2 - 0.05, pi / 2 + 0.05],
+    ])
+    user_spherical_coordinates = array([user.spherical_coordinates for user in user_manager.users]).T
+
+    aods = []
+    for batch_size in (None, 2):
+        constellation_state = ConstellationState(
+            sat_nr=2,
+            user_nr=3,
+            antenna_nr=2,
+            antenna_distance=config.sat_ant_dist,
+            antenna_gain_linear=config.sat_ant_gain_linear,
+            wavelength=config.wavelength,
+            center_aod_earth_deg=config.sat_center_aod_earth_deg,
+            batch_size=batch_size,
+            relative_aod_side=True,
+        )
+        if batch_size is None:
+            constellation_state.update_satellite_positions(spherical_coordinates=sat_spherical_coordinates)
+            constellation_state.update_user_positions(spherical_coordinates=user_spherical_coordinates)
+        else:
+            constellation_state.update_satellite_positions(spherical_coordinates=sat_spherical_coordinates[:, newaxis])
+            constellation_state.update_user_positions(spherical_coordinates=user_spherical_coordinates[:, newaxis])
+        constellation_state.calculate_geometry()
+        aods.append(constellation_state.aods)
+
+    assert array_equal(aods[1][0], aods[0])
+    assert array_equal(aods[1][1], aods[0])
@@ -0,0 +1,85 @@
+
+import pytest
+from numpy import (
+    ndarray,
+    allclose,
+)
+from numpy.random import (
+    default_rng,
+)
+from scipy.sparse import (
+    csr_matrix,
+)
+
+from src.data.precoder.mmse_precoder import (
+    mmse_precoder_no_norm,
+)
+
+
+NOISE_POWER_WATT = 0.1
+POWER_CONSTRAINT_WATT = 1.0
+
+
+def make_channel(
+        shape: tuple,
+        seed: int = 0,
+) -> ndarray:
+
+    rng = default_rng(seed)
+
+    return rng.normal(size=shape) + 1j * rng.normal(size=shape)
+
+
+def calc_precoders(
+        channel_matrix,
+) -> tuple[ndarray, ndarray]:
+
+    return tuple(
+        mmse_precoder_no_norm(
+            channel_matrix=channel_matrix,
+            noise_power_watt=NOISE_POWER_WATT,
+            power_constraint_watt=POWER_CONSTRAINT_WATT,
+            gram_space=gram_space,
+        )
+        for gram_space in ('user', 'antenna')
+    )
+
+
+def test_user_space_equals_antenna_space_dense():
+
+    precoder_user, precoder_antenna = calc_precoders(make_channel((3, 4)))
+
+    assert precoder_user.shape == (4, 3)
+    assert allclose(precoder_user, precoder_antenna)
+
+
+def test_user_space_equals_antenna_space_batched():
+
+    precoder_user, precoder_antenna = calc_precoders(make_channel((5, 3, 8)))
+
+    assert precoder_user.shape == (5, 8, 3)
+    assert allclose(precoder_user, precoder_antenna)
+
+
+def test_user_space_equals_antenna_space_sparse():
+
+    channel_matrix = make_channel((3, 8))
+    channel_matrix[0, 4:] = 0  # user 0 sees only the first satellite
+    channel_matrix[2, :4] = 0  # user 2 sees only the second satellite
+
+    precoder_user, precoder_antenna = calc_precoders(csr_matrix(channel_matrix))
+
+    assert precoder_user.shape == (8, 3)
+    assert allclose(precoder_user, precoder_antenna)
+    assert allclose(precoder_user, calc_precoders(channel_matrix)[0])
+
+
+def test_unknown_gram_space_raises():
+
+    with pytest.raises(ValueError, match='Unknown gram space'):
+        mmse_precoder_no_norm(
+            channel_matrix=make_channel((3, 4)),
+            noise_power_watt=NOISE_POWER_WATT,
+            power_constraint_watt=POWER_CONSTRAINT_WATT,
+            gram_space='satellite',
+        )
@@ -0,0 +1,32 @@
+
+from numpy import (
+    allclose,
+    isfinite,
+)
+from numpy.random import (
+    default_rng,
+)
+from scipy.sparse import (
+    csr_matrix,
+)
+
+from src.data.precoder.mrc_precoder import (
+    mrc_precoder_normalized,
+)
+
+
+def test_sparse_equals_dense_and_hidden_user_gets_zero_precoder():
+
+    rng = default_rng(0)
+    channel_matrix = rng.normal(size=(3, 8)) + 1j * rng.normal(size=(3, 8))
+    channel_matrix[0, 4:] = 0  # user 0 sees only the first satellite
+    channel_matrix[1] = 0  # user 1 sees no satellite
+
+    precoder_sparse = mrc_precoder_normalized(channel_matrix=csr_matrix(channel_matrix), power_constraint_watt=100)
+
+    assert isfinite(precoder_sparse).all()
+    assert allclose(precoder_sparse[:, 1], 0)
+    assert allclose(
+        precoder_sparse[:, [0, 2]],
+        mrc_precoder_normalized(channel_matrix=channel_matrix[[0, 2]], power_constraint_watt=100),
+    )
@@ -0,0 +1,96 @@
+
+import pytest
+from numpy import (
+    array,
+    allclose,
+    array_equal,
+)
+from scipy import (
+    constants,
+)
+
+from src.data.channel.los_channel_model import (
+    los_channel_model,
+)
+from src.data.constellation_state import (
+    ConstellationState,
+    calc_steering_vectors,
+)
+from src.utils.rng_streams import (
+    RngStreams,
+)
+
+
+WAVELENGTH = constants.value('speed of light in vacuum') / (2 * 10**9)
+SAT_ANT_NRS = [2, 4, 3]
+
+
+def make_constellation_state(
+        steering_vector_cache_quantization: float,
+        steering_vector_cache_interpolation: bool = False,
+) -> ConstellationState:
+
+    rng = RngStreams(seed=0).get('test')
+
+    constellation_state = ConstellationState(
+        sat_nr=len(SAT_ANT_NRS),
+        user_nr=4,
+        antenna_nr=SAT_ANT_NRS,
+        antenna_distance=3 * WAVELENGTH / 2,
+        antenna_gain_linear=100 / sum(SAT_ANT_NRS),
+        wavelength=WAVELENGTH,
+        center_aod_earth_deg=90,
+        steering_vector_cache_quantization=steering_vector_cache_quantization,
+        steering_vector_cache_interpolation=steering_vector_cache_interpolation,
+        precision='double',
+    )
+    constellation_state.update_satellite_positions(spherical_coordinates=array([
+        [6378.1e3 + 600e3] * len(SAT_ANT_NRS),
+        rng.uniform(1.5, 1.6, size=len(SAT_ANT_NRS)),
+        rng.uniform(1.5, 1.6, size=len(SAT_ANT_NRS)),
+    ]))
+    constellation_state.update_user_positions(spherical_coordinates=array([
+        [6378.1e3] * 4,
+        rng.uniform(1.57, 1.571, size=4),
+        rng.uniform(1.57, 1.571, size=4),
+    ]))
+    constellation_state.calculate_geometry()
+
+    return constellation_state
+
+
+@pytest.mark.parametrize('interpolation', [False, True])
+def test_cache_close_to_direct(
+        interpolation: bool,
+):
+
+    constellation_state = make_constellation_state(
+        steering_vector_cache_quantization=1e-5, steering_vector_cache_interpolation=interpolation)
+
+    steering_vectors = calc_steering_vectors(
+        aods=constellation_state.aods,
+        antenna_sat_idx=constellation_state.antenna_sat_idx,
+        antenna_steering_idx=constellation_state.antenna_steering_idx,
+        antenna_distance=3 * WAVELENGTH / 2,
+        wavelength=WAVELENGTH,
+    )
+
+    assert allclose(constellation_state.steering_vectors, steering_vectors, atol=1e-9 if interpolation else 1e-4)
+
+
+def test_cache_changed_pairs_equal_full_lookup():
+
+    constellation_state = make_constellation_state(steering_vector_cache_quantization=1e-5)
+    constellation_state.calculate_channel_state(channel_model=los_channel_model)
+
+    sat_spherical_coordinates = constellation_state.sat_spherical_coordinates.copy()
+    sat_spherical_coordinates[2, 1] += 1e-3
+    constellation_state.update_satellite_positions(spherical_coordinates=sat_spherical_coordinates)
+    constellation_state.calculate_geometry()
+
+    reference = make_constellation_state(steering_vector_cache_quantization=1e-5)
+    reference.update_satellite_positions(spherical_coordinates=sat_spherical_coordinates)
+    reference.calculate_geometry()
+
+    assert constellation_state._get_changed_pairs() is not None
+    assert array_equal(constellation_state.steering_vectors, reference.steering_vectors)